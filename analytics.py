@@ -0,0 +1,262 @@
+"""
+Solver and difficulty analytics over the word list.
+
+For every word played as a guess against every word as a possible target,
+the targets are bucketed by the feedback pattern they would produce (the
+same scoring as ``get_word_feedback``, via ``feedback.pattern_matrix``). A
+guess's 243-bucket histogram gives:
+
+* its entropy in bits: how much a guess narrows the candidates on average;
+* its expected number of remaining candidates, ``sum(n**2) / N``.
+
+Histograms are computed for blocks of guesses on a process pool, so the
+N x N pattern computation uses every core and never holds more than one
+block of patterns at a time. Because a histogram is a sum over targets, the
+cached result (``words`` and ``histograms`` in an ``.npz`` file) is updated
+incrementally when words are added: old guesses are scored only against
+the new targets and new guesses against all targets. Removing words forces
+a full rebuild.
+
+Building is slow for large word lists, so it is done offline (``init_db.py
+build-analytics``); ``load()`` only adopts a cached result that matches the
+current words, and never computes anything.
+
+A target's difficulty is the average number of bits still unknown (log2 of
+the candidates left) after each of the top-K openers is played against it.
+``replay()`` rates each guess of a game against the best guess available at
+that point among the words that could still be the answer.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import feedback
+from feedback import NUM_PATTERNS
+
+DEFAULT_BLOCK = 256
+# Below this many guess x target pairs, starting worker processes costs more than it saves
+POOL_MIN_PAIRS = 20_000_000
+# replay() looks for the best guess among at most this many remaining candidates (a fixed sample)
+REPLAY_MAX_CANDIDATES = 2000
+
+_targets = None
+
+
+def _init_worker(targets):
+    global _targets
+    _targets = targets
+
+
+def _histogram_block(guesses, targets=None):
+    targets = _targets if targets is None else targets
+    codes = feedback.pattern_matrix(guesses, targets).astype(np.intp)
+    codes += np.arange(len(guesses))[:, None] * NUM_PATTERNS
+    counts = np.bincount(codes.ravel(), minlength=len(guesses) * NUM_PATTERNS)
+    return counts.reshape(len(guesses), NUM_PATTERNS).astype(np.uint32)
+
+
+def pattern_histograms(guesses, targets, workers=None, block=DEFAULT_BLOCK):
+    """
+    ``(len(guesses), 243)`` counts of targets per feedback pattern for each
+    guess, computed in blocks of ``block`` guesses on ``workers`` processes.
+    """
+    guesses = feedback.words_to_array(guesses)
+    targets = feedback.words_to_array(targets)
+    if len(guesses) == 0 or len(targets) == 0:
+        return np.zeros((len(guesses), NUM_PATTERNS), dtype=np.uint32)
+    blocks = [guesses[start:start + block] for start in range(0, len(guesses), block)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(blocks) == 1 or len(guesses) * len(targets) < POOL_MIN_PAIRS:
+        return np.vstack([_histogram_block(b, targets) for b in blocks])
+    # spawn, not fork: the app's threads and open connections must not be copied
+    with ProcessPoolExecutor(max_workers=min(workers, len(blocks)),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(targets,)) as pool:
+        return np.vstack(list(pool.map(_histogram_block, blocks)))
+
+
+def entropy(histograms):
+    """Entropy in bits of each histogram row."""
+    counts = np.asarray(histograms, dtype=np.float64)
+    totals = counts.sum(axis=-1, keepdims=True)
+    p = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 0.0 - np.where(p > 0, p * np.log2(p), 0.0).sum(axis=-1)
+
+
+def expected_remaining(histograms):
+    """Expected number of candidates left after each row's guess."""
+    counts = np.asarray(histograms, dtype=np.float64)
+    totals = counts.sum(axis=-1)
+    return np.divide((counts ** 2).sum(axis=-1), totals, out=np.zeros_like(totals), where=totals > 0)
+
+
+class Analytics:
+
+    def __init__(self, path=None, workers=None, top_openers=10):
+        self.path = path
+        self.workers = workers
+        self.top_openers = top_openers
+        self.words = []
+        self.histograms = np.zeros((0, NUM_PATTERNS), dtype=np.uint32)
+        self._entropy = None
+        self._difficulty = None
+        self._loaded_mtime = None
+        self.last_build = None  # 'cached', 'incremental' or 'full'
+
+    # --- building ---
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path) as data:
+                return [w.decode('ascii') for w in data['words']], data['histograms']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp, words=np.array([w.encode('ascii') for w in self.words], dtype='S5'),
+                 histograms=self.histograms)
+        os.replace(tmp, self.path)
+
+    def load(self, words):
+        """
+        Adopt the cached result if it covers exactly ``words``. Returns False
+        when it is missing or stale; the file is only re-read once it changes.
+        """
+        wanted = {w.upper() for w in words}
+        if self.words and set(self.words) == wanted:
+            return True
+        try:
+            mtime = os.path.getmtime(self.path) if self.path else None
+        except OSError:
+            mtime = None
+        if mtime is None or mtime == self._loaded_mtime:
+            return False
+        cached = self._load()
+        self._loaded_mtime = mtime
+        if cached is None or set(cached[0]) != wanted:
+            return False
+        self.words, self.histograms = cached
+        self._entropy = self._difficulty = None
+        self.last_build = 'cached'
+        return True
+
+    def build(self, words):
+        """
+        Bring the analytics up to date with ``words``, reusing the in-memory
+        or on-disk result and scoring only the pairs that involve new words.
+        """
+        wanted = {w.upper() for w in words}
+        if set(self.words) == wanted and self.words:
+            self.last_build = 'cached'
+            return self
+        cached = self._load()
+        if cached is not None and set(cached[0]) <= wanted:
+            old_words, old_hist = cached
+            new_words = sorted(wanted - set(old_words))
+            if new_words:
+                old_hist = old_hist + pattern_histograms(old_words, new_words, self.workers)
+                new_hist = pattern_histograms(new_words, old_words + new_words, self.workers)
+                self.words, self.histograms = old_words + new_words, np.vstack([old_hist, new_hist])
+                self.last_build = 'incremental'
+                self._save()
+            else:
+                self.words, self.histograms = old_words, old_hist
+                self.last_build = 'cached'
+        else:
+            self.words = sorted(wanted)
+            self.histograms = pattern_histograms(self.words, self.words, self.workers)
+            self.last_build = 'full'
+            self._save()
+        self._entropy = self._difficulty = None
+        return self
+
+    # --- results ---
+    @property
+    def entropies(self):
+        if self._entropy is None:
+            self._entropy = entropy(self.histograms)
+        return self._entropy
+
+    def openers(self, k=10):
+        """The ``k`` best first guesses, by entropy over the whole word list."""
+        best = np.argsort(-self.entropies, kind='stable')[:k]
+        expected = expected_remaining(self.histograms[best])
+        return [{'word': self.words[i], 'entropy': float(self.entropies[i]), 'expected_remaining': float(e)}
+                for i, e in zip(best, expected)]
+
+    @property
+    def difficulty(self):
+        """Bits left, averaged over the top openers, for every target word (higher is harder)."""
+        if self._difficulty is None:
+            openers = [o['word'] for o in self.openers(self.top_openers)]
+            patterns = feedback.pattern_matrix(openers, self.words).astype(np.intp)
+            bits = np.zeros(len(self.words))
+            for row in patterns:
+                # Candidates left: the targets that share this target's pattern
+                bits += np.log2(np.bincount(row, minlength=NUM_PATTERNS)[row])
+            self._difficulty = bits / max(1, len(openers))
+        return self._difficulty
+
+    def ranked_targets(self, k=10, hardest=True):
+        order = np.argsort(-self.difficulty if hardest else self.difficulty, kind='stable')[:k]
+        return [{'word': self.words[i], 'difficulty': float(self.difficulty[i])} for i in order]
+
+    def replay(self, target, guesses):
+        """
+        Rate each guess of a game: the candidates it faced, its entropy and
+        expected remaining candidates, the best guess available at that point
+        and how close the guess came to it.
+        """
+        target = target.upper()
+        candidates = list(self.words) if target in self.words else self.words + [target]
+        steps = []
+        for guess in guesses:
+            guess = guess.upper()
+            sampled = False
+            if len(candidates) >= len(self.words):
+                # First guess on the full list: the cached histograms already hold the answer
+                if guess in self.words:
+                    hist = self.histograms[self.words.index(guess)]
+                else:
+                    hist = pattern_histograms([guess], candidates, workers=1)[0]
+                best = self.openers(1)[0]
+                best_word, best_entropy = best['word'], best['entropy']
+            else:
+                hist = pattern_histograms([guess], candidates, workers=1)[0]
+                pool = candidates
+                if len(pool) > REPLAY_MAX_CANDIDATES:
+                    pool = np.random.default_rng(0).choice(pool, REPLAY_MAX_CANDIDATES, replace=False).tolist()
+                    sampled = True
+                pool_entropy = entropy(pattern_histograms(pool, pool, workers=1))
+                best_index = int(np.argmax(pool_entropy))
+                best_word, best_entropy = pool[best_index], float(pool_entropy[best_index])
+            guess_entropy = float(entropy(hist))
+            if guess_entropy > best_entropy:
+                # A word that can no longer be the answer may still split the candidates better
+                best_word, best_entropy = guess, guess_entropy
+            code = feedback.score(target, guess)
+            remaining = feedback.pattern_matrix([guess], candidates)[0] == code
+            steps.append({
+                'word': guess,
+                'feedback': feedback.decode(code),
+                'candidates_before': len(candidates),
+                'entropy': guess_entropy,
+                'expected_remaining': float(expected_remaining(hist)),
+                'best_word': best_word,
+                'best_entropy': best_entropy,
+                'best_sampled': sampled,
+                'efficiency': guess_entropy / best_entropy if best_entropy else 1.0,
+                'candidates_after': int(remaining.sum()),
+            })
+            candidates = [w for w, keep in zip(candidates, remaining) if keep]
+            if code == feedback.ALL_GREEN:
+                break
+        return steps
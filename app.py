@@ -1,38 +1,222 @@
 import os
+import atexit
+import csv
+import mimetypes
 import random
 import re
 import json
+import threading
 from datetime import datetime, date, timedelta
 
-from flask import Flask, render_template, redirect, url_for, flash, request, session, jsonify
+from flask import Flask, render_template, redirect, url_for, flash, request, session, jsonify, g, has_request_context, Response, stream_with_context, stream_template, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Length, ValidationError, EqualTo, Regexp
 from functools import wraps
-from sqlalchemy import func, distinct, case
+from sqlalchemy import func, distinct, case, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, object_session, selectinload
+
+import db_config
+import feedback
+import lexicon
+import word_import
+from analytics import Analytics
+from assets import AssetManifest
+from cache import create_cache
+from instrumentation import Instrumentation
+from passwords import HasherBusy, LoginThrottle, PasswordHasher
+from report_jobs import ReportJobs, RowStream
+from feedback import FeedbackEngine
+from fragment_cache import Deferred, FragmentCacheExtension
+from word_pool import DailyTarget, VersionCheck, WordPool, daily_rng
+from write_batcher import WriteBatcher
 
 # --- Configuration ---
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a_very_secret_key_for_word_guess'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///guessword.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///guessword.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Database the admin reports read from; defaults to a read-only pool on the main database
+    # (none for in-memory SQLite, which then serves reads from the main engine)
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL') or SQLALCHEMY_DATABASE_URI
+    SQLALCHEMY_BINDS = db_config.read_binds(DATABASE_READ_URL)
+    # Connection pool per engine; unset values keep SQLAlchemy's defaults (5 + 10 overflow, 30s)
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    DB_POOL_TIMEOUT = float(os.environ['DB_POOL_TIMEOUT']) if os.environ.get('DB_POOL_TIMEOUT') else None
+    SQLALCHEMY_ENGINE_OPTIONS = db_config.engine_options(
+        SQLALCHEMY_DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT)
+    # PRAGMAs set on every SQLite connection (journal_mode only by the writer)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # milliseconds
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -16 * 1024))  # negative: KiB
+    # Hold the word x word feedback pattern matrix in memory (1 byte per pair), built in a
+    # background thread when a worker starts serving and again whenever the word list changes
+    FEEDBACK_PRECOMPUTE = os.environ.get('FEEDBACK_PRECOMPUTE') == '1'
+    # When set, target words are chosen deterministically per seed, day, user and game
+    WORD_POOL_SEED = os.environ.get('WORD_POOL_SEED')
+    # Seconds between reads of the word-table version, so every worker notices a changed word list
+    WORD_VERSION_CHECK_INTERVAL = float(os.environ.get('WORD_VERSION_CHECK_INTERVAL', 5))
+    # 'random': every game gets its own random target; 'daily': everyone plays the day's
+    # scheduled word (see `init_db.py schedule`), one game per player per day
+    GAME_MODE = os.environ.get('GAME_MODE', 'random')
+    # Games a player may start per day in 'random' mode
+    DAILY_GAME_LIMIT = int(os.environ.get('DAILY_GAME_LIMIT', 3))
+    # Word list (one word per line, or a compiled .lex file) that guesses must appear in
+    GUESS_LEXICON_PATH = os.environ.get('GUESS_LEXICON_PATH')
+    # Report the number of SQL statements each request ran in an X-Query-Count header
+    QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER') == '1'
+    # Rows per page in the admin daily and user reports
+    REPORT_PAGE_SIZE = int(os.environ.get('REPORT_PAGE_SIZE', 100))
+    # Exported reports: output directory (default instance/reports), builder threads, and
+    # seconds a report that can still change is served before being rebuilt
+    REPORT_DIR = os.environ.get('REPORT_DIR')
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 300))
+    # Seconds a finished report job's record is kept for polling
+    REPORT_JOB_TTL = int(os.environ.get('REPORT_JOB_TTL', 86400))
+    # Solver analytics: cached histograms (default instance/analytics.npz), processes that
+    # compute them, and how many top openers each target's difficulty is averaged over
+    ANALYTICS_CACHE_PATH = os.environ.get('ANALYTICS_CACHE_PATH')
+    ANALYTICS_WORKERS = int(os.environ.get('ANALYTICS_WORKERS', os.cpu_count() or 1))
+    ANALYTICS_TOP_OPENERS = int(os.environ.get('ANALYTICS_TOP_OPENERS', 10))
+    # Largest page of /admin/words?limit=N
+    WORDS_PAGE_MAX = int(os.environ.get('WORDS_PAGE_MAX', 5000))
+    # Most recent days of daily stats shown on the admin dashboard
+    DASHBOARD_DAYS = int(os.environ.get('DASHBOARD_DAYS', 90))
+    # Active-game cache used by /guess: 'memory' (per process), 'redis' (shared) or 'none'
+    GAME_CACHE_BACKEND = os.environ.get('GAME_CACHE_BACKEND', 'memory')
+    GAME_CACHE_SIZE = int(os.environ.get('GAME_CACHE_SIZE', 10000))
+    GAME_CACHE_TTL = int(os.environ.get('GAME_CACHE_TTL', 3600))
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    # Cache of the logged-in user's identity (id, username, is_admin): 'memory', 'redis' or 'none'.
+    # Changes made by this process take effect at once, other workers see them within the TTL
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND', 'memory')
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    # Built assets and manifest from `python build_assets.py` (default static/dist); without
+    # them templates link the raw files in static/
+    ASSETS_DIR = os.environ.get('ASSETS_DIR')
+    # Cache of rendered template fragments ({% cache %}): 'memory', 'redis' or 'none'
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 1000))
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 3600))
+    # Per-request timing, SQL and template metrics, served at /admin/metrics
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED') == '1'
+    # Fraction of requests to run under cProfile, dumped as .prof files to PROFILE_DIR
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    # How /guess is written: 'direct' (one commit per guess), 'group' (guesses share
+    # batched commits; the response waits for its batch) or 'async' (batched; the
+    # response is sent before the commit, so a crash can lose the last few guesses)
+    GUESS_WRITE_MODE = os.environ.get('GUESS_WRITE_MODE', 'direct')
+    # Largest batch, and longest wait in milliseconds for one to fill, in the batched modes
+    GUESS_BATCH_SIZE = int(os.environ.get('GUESS_BATCH_SIZE', 64))
+    GUESS_BATCH_DELAY_MS = float(os.environ.get('GUESS_BATCH_DELAY_MS', 5))
+    # Method and cost for new password hashes, in werkzeug's format, e.g. 'pbkdf2:sha256:600000'
+    # or 'scrypt:32768:8:1'; hashes made with other settings are replaced at the next login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2')
+    # Threads that hash passwords, and how many logins may wait for them before being turned away
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 64))
+    # Login attempts allowed per username and per client address in each window of seconds
+    LOGIN_ATTEMPTS_PER_USER = int(os.environ.get('LOGIN_ATTEMPTS_PER_USER', 5))
+    LOGIN_ATTEMPTS_PER_IP = int(os.environ.get('LOGIN_ATTEMPTS_PER_IP', 20))
+    LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300))
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto/-Host headers are trusted;
+    # with 0 the client address is the connecting peer's
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
 
 app = Flask(__name__)
 app.config.from_object(Config)
+if app.config['TRUSTED_PROXIES']:
+    # request.remote_addr is then the client's address, not the proxy's
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'],
+                            x_proto=app.config['TRUSTED_PROXIES'], x_host=app.config['TRUSTED_PROXIES'])
 
 # --- Extensions ---
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': db_config.ReadRoutingSession})
+with app.app_context():
+    for bind_key, engine in db.engines.items():
+        if engine.dialect.name == 'sqlite':
+            db_config.install_sqlite_pragmas(
+                engine, db_config.sqlite_pragmas(app.config, read_only=bind_key == db_config.READ_BIND))
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'  # Where to redirect if user is not logged in
+metrics = Instrumentation()
+if app.config['INSTRUMENTATION_ENABLED']:
+    metrics.init_app(app)
+feedback_engine = FeedbackEngine()
+word_pool = WordPool()
+daily_target = DailyTarget()
+word_version = VersionCheck(interval=app.config['WORD_VERSION_CHECK_INTERVAL'])
+game_cache = create_cache(app.config['GAME_CACHE_BACKEND'], maxsize=app.config['GAME_CACHE_SIZE'],
+                          ttl=app.config['GAME_CACHE_TTL'], redis_url=app.config['REDIS_URL'])
+metrics.gauge('word_pool_words', 'Words in the in-process word pool.', lambda: len(word_pool))
+user_cache = create_cache(app.config['USER_CACHE_BACKEND'], maxsize=app.config['USER_CACHE_SIZE'],
+                          ttl=app.config['USER_CACHE_TTL'], redis_url=app.config['REDIS_URL'])
+metrics.counter('user_cache_lookups', 'User identity cache lookups by result.',
+                lambda: {'hit': getattr(user_cache, 'hits', 0), 'miss': getattr(user_cache, 'misses', 0)},
+                label='result')
+password_hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'], workers=app.config['PASSWORD_HASH_WORKERS'],
+                                 max_pending=app.config['PASSWORD_HASH_QUEUE'])
+login_throttle = LoginThrottle(per_user=app.config['LOGIN_ATTEMPTS_PER_USER'],
+                               per_ip=app.config['LOGIN_ATTEMPTS_PER_IP'],
+                               window=app.config['LOGIN_THROTTLE_WINDOW'])
+report_jobs = ReportJobs(app.config['REPORT_DIR'] or os.path.join(app.instance_path, 'reports'),
+                         workers=app.config['REPORT_WORKERS'], ttl=app.config['REPORT_CACHE_TTL'],
+                         job_ttl=app.config['REPORT_JOB_TTL'])
+analytics_engine = Analytics(
+    app.config['ANALYTICS_CACHE_PATH'] or os.path.join(app.instance_path, 'analytics.npz'),
+    workers=app.config['ANALYTICS_WORKERS'], top_openers=app.config['ANALYTICS_TOP_OPENERS'])
+_analytics_lock = threading.Lock()
+app.jinja_env.add_extension(FragmentCacheExtension)
+app.jinja_env.fragment_cache = create_cache(
+    app.config['FRAGMENT_CACHE_BACKEND'], maxsize=app.config['FRAGMENT_CACHE_SIZE'],
+    ttl=app.config['FRAGMENT_CACHE_TTL'], redis_url=app.config['REDIS_URL'])
+metrics.counter('fragment_cache_lookups', 'Template fragment cache lookups by result.',
+                lambda: {'hit': getattr(app.jinja_env.fragment_cache, 'hits', 0),
+                         'miss': getattr(app.jinja_env.fragment_cache, 'misses', 0)},
+                label='result')
+asset_manifest = AssetManifest(app.config['ASSETS_DIR'] or os.path.join(app.static_folder, 'dist'))
+metrics.counter('login_throttled', 'Login attempts rejected by the throttle.', lambda: login_throttle.rejected)
 
 
 # --- User Loader for Flask-Login ---
+class CachedUser(UserMixin):
+    """The fields of a User that requests need, as held in the user cache."""
+
+    def __init__(self, id, username, is_admin):
+        self.id = id
+        self.username = username
+        self.is_admin = is_admin
+
+
+def _user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Authenticated requests only need the user's identity, so it is cached
+    # instead of read on every request. Updates to the user evict it.
+    user_id = int(user_id)
+    fields = user_cache.get(_user_cache_key(user_id))
+    if fields is None:
+        row = db.session.query(User.username, User.is_admin).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        fields = {'id': user_id, 'username': row.username, 'is_admin': bool(row.is_admin)}
+        user_cache.set(_user_cache_key(user_id), fields)
+    return CachedUser(**fields)
 
 
 # --- Database Models ---
@@ -44,15 +228,35 @@ class User(UserMixin, db.Model):
     games = db.relationship('GameSession', backref='player', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        with metrics.timer('check_password_hash'):
+            return password_hasher.verify(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    # Evicted once the change is committed: evicting at flush time would let a
+    # concurrent request cache the old row again before the commit
+    object_session(target).info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(db_config.ReadRoutingSession, 'after_commit')
+def _evict_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.delete(_user_cache_key(user_id))
+
+
+@event.listens_for(db_config.ReadRoutingSession, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+
+
 class Word(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(5), unique=True, nullable=False)  # 5-letter word
@@ -62,6 +266,53 @@ class Word(db.Model):
         return f'<Word {self.text}>'
 
 
+class WordVersion(db.Model):
+    # Single row (id 1) bumped by triggers on every change to the word table,
+    # so readers can tell whether the dictionary changed without scanning it.
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+WORD_VERSION_DDL = [
+    "INSERT OR IGNORE INTO word_version (id, version, updated_at) VALUES (1, 0, CURRENT_TIMESTAMP)",
+] + [
+    f"""CREATE TRIGGER IF NOT EXISTS word_version_{op.lower()} AFTER {op} ON word
+    BEGIN
+        UPDATE word_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    END"""
+    for op in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+
+@event.listens_for(db.metadata, 'after_create')
+def install_word_version_triggers(target, connection, **kw):
+    for ddl in WORD_VERSION_DDL:
+        connection.exec_driver_sql(ddl)
+
+
+@event.listens_for(Word, 'after_insert')
+@event.listens_for(Word, 'after_update')
+@event.listens_for(Word, 'after_delete')
+def _word_changed(mapper, connection, target):
+    invalidate_word_caches()
+    word_version.force()
+
+
+def invalidate_word_caches():
+    """Drop everything this worker derived from the Word table."""
+    word_pool.invalidate()
+    daily_target.invalidate()
+    feedback_engine.invalidate()
+
+
+def check_word_version():
+    """Invalidate the word caches if another worker (or an import) changed the word list."""
+    word_version.check(
+        lambda: db.session.execute(db.select(WordVersion.version).where(WordVersion.id == 1)).scalar(),
+        invalidate_word_caches)
+
+
 class GameSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -71,6 +322,12 @@ class GameSession(db.Model):
     status = db.Column(db.String(10), default='in_progress')  # 'in_progress', 'won', 'lost'
     guesses = db.relationship('Guess', backref='game_session', lazy=True, order_by='Guess.timestamp')
 
+    __table_args__ = (
+        # play(): today's games for a user; user_report: a user's games by date
+        db.Index('ix_game_session_user_date_status', 'user_id', 'date_played', 'status'),
+        # daily_report and the stats rebuild: games on a date
+        db.Index('ix_game_session_date_played', 'date_played', 'status'),
+    )
 
     def __repr__(self):
         # protect if user deleted or not loaded
@@ -82,13 +339,68 @@ class Guess(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     game_session_id = db.Column(db.Integer, db.ForeignKey('game_session.id'), nullable=False)
     guessed_word = db.Column(db.String(5), nullable=False)
-    result_json = db.Column(db.Text, nullable=False)  # store JSON string of colors
+    # Feedback as a base-3 pattern code (see feedback.py), decoded to colours only for display
+    pattern = db.Column(db.SmallInteger)
+    # Legacy JSON colour list; new rows leave it empty (`init_db.py migrate-guess-patterns` converts old ones)
+    result_json = db.Column(db.Text, nullable=False, default='')
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # A game's guesses in order (play() and the user report)
+        db.Index('ix_guess_game_session_timestamp', 'game_session_id', 'timestamp'),
+    )
+
+    @property
+    def feedback_code(self):
+        # Rows not yet migrated only have the JSON
+        if self.pattern is not None:
+            return self.pattern
+        return feedback.parse_result_json(self.result_json)
+
     def __repr__(self):
         return f'<Guess {self.guessed_word} in Game {self.game_session_id}>'
 
 
+# --- Statistics rollups ---
+# Maintained incrementally as games start and finish (see record_game_started
+# and record_game_finished); `python init_db.py rebuild-stats` recomputes them
+# from the full history and `python init_db.py check-stats` verifies them.
+class DailyStat(db.Model):
+    date = db.Column(db.Date, primary_key=True)
+    users_played = db.Column(db.Integer, nullable=False, default=0)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    total_wins = db.Column(db.Integer, nullable=False, default=0)
+    total_losses = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyStat {self.date}>'
+
+
+class UserStat(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    words_tried = db.Column(db.Integer, nullable=False, default=0)
+    correct_guesses = db.Column(db.Integer, nullable=False, default=0)
+    games_lost = db.Column(db.Integer, nullable=False, default=0)
+    last_played = db.Column(db.Date)
+
+    def __repr__(self):
+        return f'<UserStat {self.user_id}>'
+
+
+class DailyWord(db.Model):
+    # The shared target for each date in 'daily' GAME_MODE, scheduled ahead by
+    # `python init_db.py schedule`, with the day's results on that word
+    date = db.Column(db.Date, primary_key=True)
+    word_id = db.Column(db.Integer, db.ForeignKey('word.id'), nullable=False)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    win_guesses = db.Column(db.Integer, nullable=False, default=0)  # guesses over all wins
+    word = db.relationship('Word')
+
+    def __repr__(self):
+        return f'<DailyWord {self.date}>'
+
+
 # --- Forms ---
 class RegistrationForm(FlaskForm):
     username = StringField('Username', validators=[
@@ -129,26 +441,297 @@ def admin_required(f):
     return decorated_function
 
 
+def read_only(f):
+    # Run the view's queries on the read-only engine, so reports never hold up game writes
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        db_config.use_read_engine(db.session)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _feedback_words():
+    with app.app_context():
+        return db.session.execute(db.select(Word.text)).scalars().all()
+
+
+def start_feedback_build():
+    # The matrix is built in the background; until it is ready guesses are scored pair by pair
+    if app.config['FEEDBACK_PRECOMPUTE'] and not feedback_engine.loaded:
+        feedback_engine.build_async(
+            _feedback_words, on_error=lambda e: app.logger.error('Building the feedback matrix failed: %s', e))
+
+
+@app.before_request
+def _start_feedback_build():
+    start_feedback_build()
+
+
+def get_feedback_engine():
+    """Return the feedback engine, restarting the matrix build if the word list changed."""
+    check_word_version()
+    start_feedback_build()
+    return feedback_engine
+
+
+def get_word_pool():
+    """Return the in-process word pool, reloading it from the Word table if stale."""
+    check_word_version()
+    return word_pool.ensure_loaded(
+        lambda: db.session.execute(db.select(Word.id, Word.text).order_by(Word.id)).all())
+
+
+def analytics_words():
+    return db.session.execute(db.select(Word.text)).scalars().all()
+
+
+def get_analytics():
+    """
+    Return the solver analytics if the cache built by `init_db.py build-analytics`
+    matches the Word table, otherwise None. Never builds it on a request.
+    """
+    words = analytics_words()
+    with _analytics_lock:
+        return analytics_engine if analytics_engine.load(words) else None
+
+
+def analytics_unavailable():
+    return jsonify({
+        'error': 'Analytics are missing or out of date with the word list. '
+                 'Run `python init_db.py build-analytics` to build them.',
+        'status': 'building',
+    }), 503
+
+
+def load_daily_target(day):
+    """
+    Read ``day``'s scheduled ``(id, text)``. A day missing from the schedule
+    gets a word picked from the pool, seeded by the date so every worker
+    makes the same choice, and recorded so the day's statistics have a row.
+    """
+    query = db.select(DailyWord.word_id, Word.text).join(Word).where(DailyWord.date == day)
+    row = db.session.execute(query).first()
+    if row is None:
+        word = get_word_pool().pick(rng=daily_rng(app.config['WORD_POOL_SEED'] or 'daily', day))
+        if word is None:
+            return None
+        app.logger.warning('No daily word scheduled for %s; using %s', day, word[1])
+        db.session.execute(sqlite_insert(DailyWord).values(date=day, word_id=word[0]).on_conflict_do_nothing())
+        db.session.commit()
+        row = db.session.execute(query).first()
+    return tuple(row)
+
+
+def games_per_day():
+    return 1 if app.config['GAME_MODE'] == 'daily' else app.config['DAILY_GAME_LIMIT']
+
+
+def played_word_ids(user_id):
+    """Ids of every word ``user_id`` has had as a target."""
+    query = db.select(GameSession.target_word_id).where(GameSession.user_id == user_id).distinct()
+    return set(db.session.execute(query).scalars())
+
+
+def pick_target_word(games_played_today, exclude=()):
+    """
+    Pick an ``(id, text)`` target for the current user's next game: a word
+    they have never played if there is one left, otherwise any word not in
+    ``exclude`` (e.g. today's earlier targets).
+    """
+    if app.config['GAME_MODE'] == 'daily':
+        check_word_version()
+        return daily_target.get(load_daily_target)
+    rng = None
+    seed = app.config['WORD_POOL_SEED']
+    if seed:
+        rng = daily_rng(seed, date.today(), current_user.id, games_played_today)
+    pool = get_word_pool()
+    return (pool.pick(exclude=played_word_ids(current_user.id), rng=rng)
+            or pool.pick(exclude=exclude, rng=rng))
+
+
+def is_allowed_guess(word):
+    """Check a guess against the configured lexicon; every word is allowed without one."""
+    path = app.config['GUESS_LEXICON_PATH']
+    return not path or word in lexicon.load(path)
+
+
+def _upsert_stats(model, key, increments, latest=None):
+    """
+    Insert a rollup row or add ``increments`` to the existing one, in the
+    current transaction. Columns in ``latest`` keep the larger of the stored
+    and the new value.
+    """
+    latest = latest or {}
+    stmt = sqlite_insert(model).values(**key, **increments, **latest)
+    table = model.__table__
+    set_ = {name: table.c[name] + stmt.excluded[name] for name in increments}
+    set_.update({
+        name: func.max(func.coalesce(table.c[name], stmt.excluded[name]), stmt.excluded[name])
+        for name in latest
+    })
+    db.session.execute(stmt.on_conflict_do_update(index_elements=list(key), set_=set_))
+
+
+def _daily_word_game(day, target_word_id):
+    # Only games on the day's scheduled word, played in 'daily' GAME_MODE, count towards its DailyWord row
+    return db.update(DailyWord).where(DailyWord.date == day, DailyWord.word_id == target_word_id)
+
+
+def record_game_started(user_id, day, first_game_today, target_word_id=None):
+    _upsert_stats(DailyStat, {'date': day},
+                  {'games_played': 1, 'users_played': int(first_game_today)})
+    _upsert_stats(UserStat, {'user_id': user_id}, {'words_tried': 1},
+                  latest={'last_played': day})
+    if target_word_id is not None and app.config['GAME_MODE'] == 'daily':
+        db.session.execute(_daily_word_game(day, target_word_id).values(games_played=DailyWord.games_played + 1))
+
+
+def record_game_finished(user_id, day, won, target_word_id=None, guesses_made=0):
+    _upsert_stats(DailyStat, {'date': day},
+                  {'total_wins': int(won), 'total_losses': int(not won)})
+    _upsert_stats(UserStat, {'user_id': user_id},
+                  {'correct_guesses': int(won), 'games_lost': int(not won)})
+    if won and target_word_id is not None and app.config['GAME_MODE'] == 'daily':
+        db.session.execute(_daily_word_game(day, target_word_id).values(
+            wins=DailyWord.wins + 1, win_guesses=DailyWord.win_guesses + guesses_made))
+
+
+def _game_cache_key(game_session_id):
+    return f'game:{game_session_id}'
+
+
+def cache_active_game(game_session_id, user_id, target_word, guesses_made, date_played, target_word_id=None):
+    """Remember an in-progress game's state so /guess does not have to read it."""
+    game = {
+        'user_id': user_id,
+        'target_word': target_word,
+        'target_word_id': target_word_id,
+        'guesses_made': guesses_made,
+        'status': 'in_progress',
+        'date_played': date_played.isoformat(),
+        'cached_on': date.today().isoformat(),
+    }
+    game_cache.set(_game_cache_key(game_session_id), game)
+    return game
+
+
+def get_active_game(game_session_id, refresh=False):
+    """
+    Return a game's state as a dict, from the cache when possible.
+
+    Entries cached before today are dropped so the cache turns over at the
+    day boundary. On a miss the game and its target word are read in one
+    query, and in-progress games are cached again.
+    """
+    if not refresh:
+        game = game_cache.get(_game_cache_key(game_session_id))
+        if game is not None and game['cached_on'] == date.today().isoformat():
+            return game
+
+    # Queued guesses may be ahead of the database; write them before reading it
+    flush_queued_guesses()
+    row = db.session.query(
+        GameSession.user_id, GameSession.guesses_made, GameSession.status,
+        GameSession.date_played, GameSession.target_word_id, Word.text
+    ).join(Word, Word.id == GameSession.target_word_id).filter(GameSession.id == game_session_id).first()
+    if row is None:
+        game_cache.delete(_game_cache_key(game_session_id))
+        return None
+    if row.status != 'in_progress':
+        game_cache.delete(_game_cache_key(game_session_id))
+        return {'user_id': row.user_id, 'status': row.status}
+    return cache_active_game(game_session_id, row.user_id, row.text, row.guesses_made or 0, row.date_played,
+                             row.target_word_id)
+
+
+def write_guess_batch(guesses):
+    """
+    Write guesses queued by /guess in the batched GUESS_WRITE_MODEs, all in one
+    transaction.
+
+    Each guess advances its game only if the game is still where the request
+    saw it. A guess that lost that race (another worker moved the game on) is
+    dropped and marked ``dropped``, and its game is evicted from the cache.
+    If the transaction fails, every game in the batch is evicted so the next
+    request reads the database instead of the cache.
+    """
+    with app.app_context():
+        try:
+            for item in guesses:
+                updated = db.session.execute(
+                    db.update(GameSession)
+                    .where(GameSession.id == item['game_session_id'],
+                           GameSession.guesses_made == item['guesses_made'] - 1,
+                           GameSession.status == 'in_progress')
+                    .values(guesses_made=item['guesses_made'], status=item['status'])
+                ).rowcount
+                if updated != 1:
+                    item['dropped'] = True
+                    game_cache.delete(_game_cache_key(item['game_session_id']))
+                    continue
+                db.session.execute(db.insert(Guess).values(
+                    game_session_id=item['game_session_id'],
+                    guessed_word=item['guessed_word'],
+                    pattern=item['pattern'],
+                    timestamp=item['timestamp']
+                ))
+                if item['status'] != 'in_progress':
+                    record_game_finished(item['user_id'], item['date_played'],
+                                         won=item['status'] == 'won', target_word_id=item['target_word_id'],
+                                         guesses_made=item['guesses_made'])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for item in guesses:
+                game_cache.delete(_game_cache_key(item['game_session_id']))
+            raise
+
+
+guess_writer = WriteBatcher(write_guess_batch, max_batch=app.config['GUESS_BATCH_SIZE'],
+                            max_delay=app.config['GUESS_BATCH_DELAY_MS'] / 1000, name='guess-writer')
+# Write whatever is still queued when the process exits normally
+atexit.register(guess_writer.close)
+
+# In the batched modes the cache is updated before the write is committed, so
+# guesses for the same game are serialised within the process.
+_game_locks = [threading.Lock() for _ in range(64)]
+
+
+def flush_queued_guesses():
+    """Wait until queued guesses are written, without holding a pooled connection meanwhile."""
+    if guess_writer.pending:
+        db.session.close()
+        guess_writer.flush()
+
+
+def _game_lock(game_session_id):
+    return _game_locks[hash(game_session_id) % len(_game_locks)]
+
+
 def get_word_feedback(target_word, guessed_word):
-    feedback = ['grey'] * 5
-    target_letters = list(target_word)
-    guessed_letters = list(guessed_word)
+    # Compatibility wrapper: colour list for a single pair
+    with metrics.timer('get_word_feedback'):
+        return feedback.decode(get_feedback_engine().score(target_word, guessed_word))
+
 
-    # First pass: check for green (correct letter and position)
-    for i in range(5):
-        if guessed_letters[i] == target_letters[i]:
-            feedback[i] = 'green'
-            target_letters[i] = None  # Mark as used
-            guessed_letters[i] = None  # Mark as used
+# --- Request-level query counter (also read by the instrumentation) ---
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
 
-    # Second pass: check for orange (correct letter, wrong position)
-    for i in range(5):
-        if guessed_letters[i] is not None:  # If not already green
-            if guessed_letters[i] in target_letters:
-                feedback[i] = 'orange'
-                target_letters[target_letters.index(guessed_letters[i])] = None  # Mark as used
 
-    return feedback
+def get_query_count():
+    """Number of SQL statements executed so far in the current request."""
+    return g.get('query_count', 0)
+
+
+@app.after_request
+def add_query_count_header(response):
+    if app.config['QUERY_COUNT_HEADER'] or app.testing:
+        response.headers['X-Query-Count'] = str(get_query_count())
+    return response
 
 
 @app.context_processor
@@ -156,6 +739,30 @@ def inject_now():
     return {'now': datetime.utcnow}
 
 
+@app.template_global()
+def asset_url(filename):
+    """URL of a static asset: its content-hashed build if there is one, else the raw file."""
+    built = asset_manifest.lookup(filename)
+    if built is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=built)
+
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    # Built assets never change under a given name; serve the best pre-compressed copy
+    if not asset_manifest.is_built(filename):
+        return Response('Not found\n', status=404, mimetype='text/plain')
+    path, encoding = asset_manifest.variant(filename, request.accept_encodings)
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], max_age=31536000)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 # --- Routes ---
 @app.route('/')
 @app.route('/index')
@@ -194,7 +801,11 @@ def register():
             
         # If the username is unique, create the new user
         user = User(username=username_upper) 
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HasherBusy:
+            flash('The server is busy. Please try again in a moment.', 'danger')
+            return render_template('register.html', title='Register', form=form), 503
         
         try:
             db.session.add(user)
@@ -218,10 +829,30 @@ def login():
         return redirect(url_for('play'))
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(username=form.username.data.upper()).first()
-        if user is None or not user.check_password(form.password.data):
+        username = form.username.data.upper()
+        # Bursts are turned away before the user is looked up or a hash computed
+        retry_after = login_throttle.attempt(username, request.remote_addr)
+        if retry_after:
+            flash(f'Too many login attempts. Please try again in {int(retry_after) + 1} seconds.', 'danger')
+            return render_template('login.html', title='Login', form=form), 429
+        user = User.query.filter_by(username=username).first()
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except HasherBusy:
+            flash('The server is busy. Please try again in a moment.', 'danger')
+            return render_template('login.html', title='Login', form=form), 503
+        if not valid:
+            login_throttle.failed(request.remote_addr)
             flash('Invalid username or password', 'danger')
             return redirect(url_for('login'))
+        login_throttle.succeeded(username)
+        if password_hasher.needs_rehash(user.password_hash):
+            # Hashing settings changed since this hash was made; upgrade it now we know the password
+            try:
+                user.set_password(form.password.data)
+                db.session.commit()
+            except HasherBusy:
+                pass
         login_user(user, remember=form.remember_me.data)
         
         # --- ADDED CHECK HERE ---
@@ -245,29 +876,34 @@ def logout():
 @login_required
 def play():
 
-    # Define the daily game limit
-    DAILY_GAME_LIMIT = 3
-    
-    # 1. First, check for an existing game that is currently in progress.
-    # We only want one active game at a time.
-    game_session = GameSession.query.filter_by(
+    # One game a day on the shared word in 'daily' mode, DAILY_GAME_LIMIT otherwise
+    daily_game_limit = games_per_day()
+
+    # In 'async' guess mode this player's last guesses may still be queued
+    flush_queued_guesses()
+
+    # 1. Fetch all of today's games (at most daily_game_limit) together with
+    # their target words and guesses in a single round trip. The in-progress
+    # game and today's count both come from this one result.
+    todays_games = GameSession.query.options(
+        joinedload(GameSession.target_word),
+        joinedload(GameSession.guesses),
+    ).filter_by(
         user_id=current_user.id,
-        date_played=date.today(),
-        status='in_progress'
-    ).first()
+        date_played=date.today()
+    ).all()
+    games_played_today = len(todays_games)
+
+    # We only want one active game at a time.
+    game_session = next((todays_game for todays_game in todays_games if todays_game.status == 'in_progress'), None)
 
     # 2. If no in-progress game is found, check if a new one can be created.
     if not game_session:
-        # Count all game sessions (won, lost, or in_progress) for today.
-        games_played_today = GameSession.query.filter_by(
-            user_id=current_user.id,
-            date_played=date.today()
-        ).count()
-        
         # Check if the user has any remaining daily games.
-        if games_played_today < DAILY_GAME_LIMIT:
-            # Get a random word for the new game
-            target_word = Word.query.order_by(db.func.random()).first()
+        if games_played_today < daily_game_limit:
+            # Get the day's word, or a random one the player hasn't had before
+            target_word = pick_target_word(
+                games_played_today, exclude={todays_game.target_word_id for todays_game in todays_games})
             if not target_word:
                 flash("No words available to play.", "danger")
                 return redirect(url_for('index'))
@@ -275,12 +911,28 @@ def play():
             # Create a new game session
             game_session = GameSession(
                 user_id=current_user.id,
-                target_word_id=target_word.id,
+                target_word_id=target_word[0],
                 guesses_made=0,
                 status='in_progress'
             )
             db.session.add(game_session)
+            db.session.flush()
+            game_session_id = game_session.id
+            record_game_started(current_user.id, game_session.date_played,
+                                first_game_today=games_played_today == 0, target_word_id=target_word[0])
             db.session.commit()
+            cache_active_game(game_session_id, current_user.id, target_word[1], 0, date.today(), target_word[0])
+
+            return render_template(
+                "play.html",
+                game_session_id=game_session_id,
+                guesses_made=0,
+                previous_guesses=[],
+                game_over=False,
+                message=None,
+                games_played_today=games_played_today + 1,
+                daily_game_limit=daily_game_limit
+            )
         else:
             # If the daily limit has been reached, set game_over to true.
             game_over = True
@@ -293,17 +945,19 @@ def play():
                 game_session_id=None,
                 guesses_made=0,
                 previous_guesses=[],
-                games_played_today=games_played_today
+                games_played_today=games_played_today,
+                daily_game_limit=daily_game_limit
             )
 
-    # 3. Handle the case where a game session (new or existing) is available.
-    # Fetch previous guesses for the game session
-    guesses = Guess.query.filter_by(game_session_id=game_session.id).all()
+    # 3. Handle the case where an existing game session is available.
+    # Its guesses were loaded with it, in order.
+    cache_active_game(game_session.id, game_session.user_id, game_session.target_word.text,
+                      game_session.guesses_made, game_session.date_played, game_session.target_word_id)
     previous_guesses = [
         {
-            "word": g.guessed_word,
-            "feedback": json.loads(g.result_json) # Load the stored JSON string
-        } for g in guesses
+            "word": guess_row.guessed_word,
+            "feedback": feedback.decode(guess_row.feedback_code)
+        } for guess_row in game_session.guesses
     ]
     
     # Check if the game is over
@@ -314,12 +968,6 @@ def play():
     elif game_session.status == 'lost':
         message = f'❌Better luck next time! The word was {game_session.target_word.text}.'
 
-    # Calculate number of games played for the day
-    games_played_today = GameSession.query.filter_by(
-        user_id=current_user.id,
-        date_played=date.today()
-    ).count()
-
     return render_template(
         "play.html",
         game_session_id=game_session.id,
@@ -327,83 +975,188 @@ def play():
         previous_guesses=previous_guesses,
         game_over=game_over,
         message=message,
-        games_played_today=games_played_today
+        games_played_today=games_played_today,
+        daily_game_limit=daily_game_limit
     )
 # In the guess() route
-@app.route('/guess', methods=['POST'])
-@login_required
-def guess():
-    data = request.get_json()
-    game_session_id = data.get('game_session_id')
-    guessed_word = data.get('word', '').upper()
-
-    game_session = GameSession.query.get(game_session_id)
-
-    if not game_session or game_session.user_id != current_user.id or game_session.status != 'in_progress':
-        return jsonify({'error': 'Invalid game session or game is over.'}), 400
+def evaluate_guess(game, guessed_word):
+    """
+    Check a guess against an active game's state and score it.
 
+    Returns ``(error, None)`` for a guess that cannot be accepted, otherwise
+    ``(None, result)`` where result holds the pattern, the new guess count,
+    the game's new status and the message for the player.
+    """
     if len(guessed_word) != 5 or not guessed_word.isalpha():
-        return jsonify({'error': 'Guess must be a 5-letter English word.'}), 400
+        return 'Guess must be a 5-letter English word.', None
 
-    target_word_text = game_session.target_word.text
-    feedback = get_word_feedback(target_word_text, guessed_word)
+    target_word_text = game['target_word']
+    if guessed_word != target_word_text and not is_allowed_guess(guessed_word):
+        return 'Not in word list.', None
 
-    # Save the guess
-    new_guess = Guess(
-        game_session_id=game_session.id,
-        guessed_word=guessed_word,
-        result_json=json.dumps(feedback)
-    )
-    db.session.add(new_guess)
-    game_session.guesses_made += 1
-
-    game_over = False
-    message = None
+    with metrics.timer('get_word_feedback'):
+        pattern = get_feedback_engine().score(target_word_text, guessed_word)
+    guesses_made = game['guesses_made'] + 1
 
     if guessed_word == target_word_text:
-        game_session.status = 'won'
+        status = 'won'
         message = 'Congratulations! You guessed the word!'
-        game_over = True
-    elif game_session.guesses_made >= 5:
-        game_session.status = 'lost'
+    elif guesses_made >= 5:
+        status = 'lost'
         message = f'Better luck next time! The word was {target_word_text}.'
-        game_over = True
     else:
-        message = f'You have {5 - game_session.guesses_made} guesses remaining.'
+        status = 'in_progress'
+        message = f'You have {5 - guesses_made} guesses remaining.'
+    return None, {'pattern': pattern, 'guesses_made': guesses_made, 'status': status, 'message': message}
 
-    db.session.commit()
 
+def guess_response(guessed_word, result):
     return jsonify({
         'guessed_word': guessed_word,
-        'feedback': feedback,
-        'guesses_made': game_session.guesses_made,
-        'game_over': game_over,
-        'message': message,
-        'status': game_session.status
+        'feedback': feedback.decode(result['pattern']),
+        'guesses_made': result['guesses_made'],
+        'game_over': result['status'] != 'in_progress',
+        'message': result['message'],
+        'status': result['status']
     })
 
 
+@app.route('/guess', methods=['POST'])
+@login_required
+def guess():
+    data = request.get_json()
+    try:
+        game_session_id = int(data.get('game_session_id'))
+    except (TypeError, ValueError):
+        game_session_id = None
+    guessed_word = data.get('word', '').upper()
+
+    if game_session_id and app.config['GUESS_WRITE_MODE'] in ('group', 'async'):
+        return queue_guess(game_session_id, guessed_word)
+
+    # The game's state normally comes from the active-game cache, so the
+    # guess is a single write transaction. If another worker has moved the
+    # game on since it was cached, the write matches no row and the guess is
+    # retried once against fresh state from the database.
+    for attempt in range(2):
+        game = get_active_game(game_session_id, refresh=attempt > 0) if game_session_id else None
+
+        if not game or game['user_id'] != current_user.id or game['status'] != 'in_progress':
+            return jsonify({'error': 'Invalid game session or game is over.'}), 400
+
+        error, result = evaluate_guess(game, guessed_word)
+        if error:
+            return jsonify({'error': error}), 400
+        guesses_made, status = result['guesses_made'], result['status']
+
+        # Save the guess and advance the game, only if it is still where we think it is
+        db.session.execute(db.insert(Guess).values(
+            game_session_id=game_session_id,
+            guessed_word=guessed_word,
+            pattern=result['pattern']
+        ))
+        updated = db.session.execute(
+            db.update(GameSession)
+            .where(GameSession.id == game_session_id,
+                   GameSession.guesses_made == game['guesses_made'],
+                   GameSession.status == 'in_progress')
+            .values(guesses_made=guesses_made, status=status)
+        ).rowcount
+        if updated == 1:
+            break
+        db.session.rollback()
+    else:
+        return jsonify({'error': 'The game changed while saving your guess. Please try again.'}), 409
+
+    game_over = status != 'in_progress'
+    if game_over:
+        record_game_finished(game['user_id'], date.fromisoformat(game['date_played']),
+                             won=status == 'won', target_word_id=game.get('target_word_id'),
+                             guesses_made=guesses_made)
+    db.session.commit()
+
+    if game_over:
+        game_cache.delete(_game_cache_key(game_session_id))
+    else:
+        game['guesses_made'] = guesses_made
+        game_cache.set(_game_cache_key(game_session_id), game)
+
+    return guess_response(guessed_word, result)
+
+
+def queue_guess(game_session_id, guessed_word):
+    """
+    /guess in the batched write modes: score the guess, advance the cached
+    game and hand the write to the background guess writer.
+
+    In 'group' mode the response waits until the guess's batch is committed,
+    so an acknowledged guess is as durable as in 'direct' mode. In 'async'
+    mode it does not wait: guesses still queued when the process is killed
+    are lost (a normal exit drains the queue), but every batch is one
+    transaction, so the database never holds half a guess.
+    """
+    with _game_lock(game_session_id):
+        game = get_active_game(game_session_id)
+        if not game or game['user_id'] != current_user.id or game['status'] != 'in_progress':
+            return jsonify({'error': 'Invalid game session or game is over.'}), 400
+
+        error, result = evaluate_guess(game, guessed_word)
+        if error:
+            return jsonify({'error': error}), 400
+
+        item = {
+            'game_session_id': game_session_id,
+            'user_id': game['user_id'],
+            'date_played': date.fromisoformat(game['date_played']),
+            'target_word_id': game.get('target_word_id'),
+            'guessed_word': guessed_word,
+            'pattern': result['pattern'],
+            'guesses_made': result['guesses_made'],
+            'status': result['status'],
+            'timestamp': datetime.utcnow(),
+        }
+        if result['status'] != 'in_progress':
+            game_cache.delete(_game_cache_key(game_session_id))
+        else:
+            game['guesses_made'] = result['guesses_made']
+            game_cache.set(_game_cache_key(game_session_id), game)
+        ticket = guess_writer.submit(item)
+
+    if app.config['GUESS_WRITE_MODE'] == 'group':
+        # The writer needs a pooled connection too; don't sit on this request's
+        db.session.close()
+        try:
+            ticket.wait()
+        except Exception:
+            return jsonify({'error': 'Your guess could not be saved. Please try again.'}), 503
+        if item.get('dropped'):
+            return jsonify({'error': 'The game changed while saving your guess. Please try again.'}), 409
+    return guess_response(guessed_word, result)
+
+
 # --- IMPROVED ADMIN ROUTES ---
 @app.route('/admin')
 @admin_required
+@read_only
 def admin_dashboard():
     # This route now fetches all data needed for the admin dashboard
     
-    # Daily game stats
+    # Daily game stats, read from the precomputed rollup
     daily_stats = db.session.query(
-        GameSession.date_played.label('date'),
-        func.count(distinct(GameSession.user_id)).label('users_played'),
-        func.sum(case((GameSession.status == 'won', 1), else_=0)).label('total_wins')
-    ).group_by(GameSession.date_played).order_by(GameSession.date_played.desc()).all()
+        DailyStat.date,
+        DailyStat.users_played,
+        DailyStat.total_wins
+    ).order_by(DailyStat.date.desc()).limit(app.config['DASHBOARD_DAYS']).all()
     
-    # User stats
+    # User stats, read from the precomputed rollup
+    words_tried = func.coalesce(UserStat.words_tried, 0)
     users_with_stats = db.session.query(
         User.id,
         User.username,
-        func.count(GameSession.id).label('words_tried'),
-        func.sum(case((GameSession.status == 'won', 1), else_=0)).label('correct_guesses'),
-        func.max(GameSession.date_played).label('last_played')
-    ).outerjoin(GameSession).group_by(User.id).order_by(func.count(GameSession.id).desc()).all()
+        words_tried.label('words_tried'),
+        func.coalesce(UserStat.correct_guesses, 0).label('correct_guesses'),
+        UserStat.last_played.label('last_played')
+    ).outerjoin(UserStat, UserStat.user_id == User.id).order_by(words_tried.desc()).all()
     
     return render_template(
         'admin_reports.html',
@@ -412,61 +1165,388 @@ def admin_dashboard():
         users=users_with_stats, # Pass the user list with stats
     )
 
+@app.route('/admin/metrics')
+@admin_required
+def admin_metrics():
+    # Prometheus text exposition of the request instrumentation
+    if not metrics.enabled:
+        return Response('Instrumentation is disabled; set INSTRUMENTATION_ENABLED=1.\n',
+                        status=404, mimetype='text/plain')
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/admin/words')
 @admin_required
+@read_only
 def admin_words():
-    words = Word.query.all()
-    # Convert SQLAlchemy objects to a list of dictionaries for JSON serialization
-    out = [{"id": w.id, "text": w.text} for w in words]
-    return jsonify(out)
+    """
+    The word list, streamed so memory stays flat however large it is.
+
+    - default: a JSON array of {"id", "text"} objects (as before);
+    - ?format=ndjson: one JSON object per line;
+    - ?limit=N[&after_id=K]: one keyset page, {"words": [...], "next_after_id": ...}.
+
+    Responses carry an ETag and Last-Modified derived from the word-table
+    version counter, and conditional requests get a 304 while it is unchanged.
+    """
+    after_id = request.args.get('after_id', 0, type=int)
+    limit = request.args.get('limit', type=int)
+    output = request.args.get('format', 'json')
+
+    version = db.session.get(WordVersion, 1)
+    etag = f"words-{version.version if version else 0}-{output}-{after_id}-{limit}"
+    last_modified = version.updated_at if version else None
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        query = db.select(Word.id, Word.text).where(Word.id > after_id).order_by(Word.id)
+        if limit is not None:
+            limit = max(1, min(limit, app.config['WORDS_PAGE_MAX']))
+            words = [{"id": w.id, "text": w.text} for w in db.session.execute(query.limit(limit + 1))]
+            next_after_id = words[limit - 1]["id"] if len(words) > limit else None
+            response = jsonify({"words": words[:limit], "next_after_id": next_after_id})
+        else:
+            rows = db.session.execute(query.execution_options(yield_per=1000))
+            if output == 'ndjson':
+                body = (json.dumps({"id": w.id, "text": w.text}) + '\n' for w in rows)
+                response = Response(stream_with_context(body), mimetype='application/x-ndjson')
+            else:
+                response = Response(stream_with_context(_json_array(rows)), mimetype='application/json')
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _json_array(rows):
+    yield '['
+    for i, w in enumerate(rows):
+        yield (',' if i else '') + json.dumps({"id": w.id, "text": w.text})
+    yield ']'
+
+@app.route('/admin/words', methods=['POST'])
+@admin_required
+def admin_upload_words():
+    # Bulk import an uploaded word list (one word per line) in batches
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'Upload a word list as the "file" field.'}), 400
+
+    stats = word_import.import_words(
+        db.engine, Word.__table__, word_import.read_lines([upload.stream]),
+        dry_run=request.args.get('dry_run') == '1')
+    if stats.inserted:
+        invalidate_word_caches()
+    return jsonify(stats.as_dict())
 
 @app.route('/admin/reports/daily', methods=['GET'])
 @admin_required
+@read_only
 def daily_report():
     report_date_str = request.args.get('date', date.today().isoformat())
     report_date = datetime.strptime(report_date_str, '%Y-%m-%d').date()
+    per_page = app.config['REPORT_PAGE_SIZE']
+    # Queried only if the page isn't in the fragment cache (final days are cached, others aren't)
+    summary = Deferred(lambda: daily_report_summary(report_date))
 
-    # Number of unique users who played
-    unique_users_played = db.session.query(GameSession.user_id).filter_by(date_played=report_date).distinct().count()
-
-    # Number of correct guesses (wins)
-    correct_guesses = GameSession.query.filter_by(date_played=report_date, status='won').count()
-
-    # List of all games for the day
-    games_for_day = GameSession.query.filter_by(date_played=report_date).all()
+    # One page of the day's games; the summary already counted them
+    games_for_day = Deferred(lambda: paginate_counted(daily_report_games(report_date), summary[2], per_page))
+    fragment = None
+    if daily_report_final(report_date):
+        fragment = ('daily-report', report_date.isoformat(), request.args.get('page', 1, type=int), per_page)
 
     return render_template('pdf_report.html',
                            title=f'Daily Report for {report_date}',
                            report_type='daily',
                            report_date=report_date,
-                           unique_users_played=unique_users_played,
-                           correct_guesses=correct_guesses,
-                           games_for_day=games_for_day)
+                           unique_users_played=Deferred(lambda: summary[0]),
+                           correct_guesses=Deferred(lambda: summary[1]),
+                           games_for_day=games_for_day,
+                           fragment=fragment)
 
 @app.route('/admin/reports/user/<int:user_id>', methods=['GET'])
 @admin_required
+@read_only
 def user_report(user_id):
     user = User.query.get_or_404(user_id)
+    games_played, games_won, games_lost = user_report_summary(user.id)
 
-    user_game_sessions = GameSession.query.filter_by(user_id=user.id).order_by(GameSession.date_played.desc()).all()
-
-    report_data = []
-    for session in user_game_sessions:
-        report_data.append({
-            'date': session.date_played,
-            'target_word': session.target_word.text,
-            'status': session.status,
-            'guesses_made': session.guesses_made,
-            'guesses': [guess.guessed_word for guess in session.guesses]
-        })
+    # One page of games; the summary already counted them
+    pagination = paginate_counted(user_report_games(user.id), games_played, app.config['REPORT_PAGE_SIZE'])
+    report_data = [user_report_row(session) for session in pagination.items]
 
     return render_template('pdf_report.html',
                            title=f'User Report for {user.username}',
                            report_type='user',
                            user=user,
+                           games_played=games_played,
+                           games_won=games_won,
+                           games_lost=games_lost,
+                           pagination=pagination,
                            report_data=report_data)
 
 
+# --- Report exports ---
+def daily_report_final(report_date):
+    """
+    Whether the daily report for ``report_date`` can no longer change: the
+    day is over and no game from it is still in progress (such a game can
+    still be won or lost, changing the report).
+    """
+    if report_date >= date.today():
+        return False
+    unfinished = db.select(GameSession.id).where(GameSession.date_played == report_date,
+                                                 GameSession.status == 'in_progress').limit(1)
+    return db.session.execute(unfinished).first() is None
+
+
+def daily_report_summary(report_date):
+    """(unique users who played, wins, games) on ``report_date``."""
+    return db.session.query(
+        func.count(distinct(GameSession.user_id)),
+        func.coalesce(func.sum(case((GameSession.status == 'won', 1), else_=0)), 0),
+        func.count(GameSession.id)
+    ).filter(GameSession.date_played == report_date).one()
+
+
+def paginate_counted(query, total, per_page):
+    """Paginate ``query`` whose row count ``total`` is already known, skipping paginate()'s COUNT."""
+    pagination = query.paginate(per_page=per_page, error_out=False, count=False)
+    pagination.total = total
+    return pagination
+
+
+def daily_report_games(report_date):
+    # The day's games, with players and target words joined in
+    return GameSession.query.options(
+        joinedload(GameSession.player),
+        joinedload(GameSession.target_word)
+    ).filter_by(date_played=report_date).order_by(GameSession.id)
+
+
+def user_report_summary(user_id):
+    """(games played, won, lost) by the user."""
+    return db.session.query(
+        func.count(GameSession.id),
+        func.coalesce(func.sum(case((GameSession.status == 'won', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((GameSession.status == 'lost', 1), else_=0)), 0)
+    ).filter(GameSession.user_id == user_id).one()
+
+
+def user_report_games(user_id):
+    # Target words are joined in and each batch's guesses are fetched with a single IN query
+    return GameSession.query.options(
+        joinedload(GameSession.target_word),
+        selectinload(GameSession.guesses).load_only(Guess.guessed_word)
+    ).filter_by(user_id=user_id).order_by(
+        GameSession.date_played.desc(), GameSession.id.desc()
+    )
+
+
+def user_report_row(session):
+    return {
+        'date': session.date_played,
+        'target_word': session.target_word.text,
+        'status': session.status,
+        'guesses_made': session.guesses_made,
+        'guesses': [guess.guessed_word for guess in session.guesses]
+    }
+
+
+def _write_rows_as_csv(rows, fh, header, columns):
+    # Pass rows through to the HTML template, writing each to the CSV on the way
+    writer = csv.writer(fh)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(columns(row))
+        yield row
+
+
+def build_daily_report(params, paths):
+    """Write the full daily report as CSV and HTML, streaming the games in batches."""
+    report_date = date.fromisoformat(params['date'])
+    with app.app_context():
+        db_config.use_read_engine(db.session)
+        unique_users_played, correct_guesses, games = daily_report_summary(report_date)
+        with open(paths['csv'], 'w', newline='') as csv_file, open(paths['html'], 'w') as html_file:
+            rows = _write_rows_as_csv(
+                daily_report_games(report_date).yield_per(app.config['REPORT_PAGE_SIZE']), csv_file,
+                ['game_id', 'player', 'target_word', 'guesses_made', 'status', 'date_played'],
+                lambda game: [game.id, game.player.username, game.target_word.text, game.guesses_made,
+                              game.status, game.date_played.isoformat()])
+            html_file.writelines(stream_template(
+                'pdf_report.html',
+                title=f'Daily Report for {report_date}',
+                report_type='daily',
+                report_date=report_date,
+                unique_users_played=unique_users_played,
+                correct_guesses=correct_guesses,
+                games_for_day=RowStream(rows, games)))
+
+
+def build_user_report(params, paths):
+    """Write a user's full game history as CSV and HTML, streaming the games in batches."""
+    with app.app_context():
+        db_config.use_read_engine(db.session)
+        user = db.session.get(User, params['user_id'])
+        games_played, games_won, games_lost = user_report_summary(user.id)
+        games = (user_report_row(session) for session in
+                 user_report_games(user.id).yield_per(app.config['REPORT_PAGE_SIZE']))
+        with open(paths['csv'], 'w', newline='') as csv_file, open(paths['html'], 'w') as html_file:
+            rows = _write_rows_as_csv(
+                games, csv_file, ['date', 'target_word', 'status', 'guesses_made', 'guesses'],
+                lambda game: [game['date'].isoformat(), game['target_word'], game['status'],
+                              game['guesses_made'], ' '.join(game['guesses'])])
+            report_data = RowStream(rows, games_played)
+            html_file.writelines(stream_template(
+                'pdf_report.html',
+                title=f'User Report for {user.username}',
+                report_type='user',
+                user=user,
+                games_played=games_played,
+                games_won=games_won,
+                games_lost=games_lost,
+                pagination=report_data,
+                report_data=report_data))
+
+
+report_jobs.register('daily', build_daily_report)
+report_jobs.register('user', build_user_report)
+
+
+def report_job_json(job):
+    body = {
+        'job_id': job['id'],
+        'report': job['key'],
+        'status': job['status'],
+        'cached': job['cached'],
+        'error': job['error'],
+        'poll_url': url_for('report_job', job_id=job['id']),
+    }
+    if job['status'] == 'done':
+        body['downloads'] = {fmt: url_for('report_job_download', job_id=job['id'], fmt=fmt)
+                             for fmt in ('csv', 'html')}
+    return body
+
+
+@app.route('/admin/reports/daily/export', methods=['POST'])
+@admin_required
+def export_daily_report():
+    # Build the whole day's report in the background; it is kept for good once the day is final
+    try:
+        report_date = date.fromisoformat(request.args.get('date', date.today().isoformat()))
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD.'}), 400
+    job = report_jobs.enqueue('daily', f'daily-{report_date.isoformat()}', {'date': report_date.isoformat()},
+                              permanent=daily_report_final(report_date))
+    return jsonify(report_job_json(job)), 202
+
+
+@app.route('/admin/reports/user/<int:user_id>/export', methods=['POST'])
+@admin_required
+def export_user_report(user_id):
+    if db.session.get(User, user_id) is None:
+        return jsonify({'error': 'Unknown user.'}), 404
+    job = report_jobs.enqueue('user', f'user-{user_id}', {'user_id': user_id})
+    return jsonify(report_job_json(job)), 202
+
+
+@app.route('/admin/reports/jobs/<job_id>')
+@admin_required
+def report_job(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown report job.'}), 404
+    return jsonify(report_job_json(job))
+
+
+@app.route('/admin/reports/jobs/<job_id>/report.<any(csv, html):fmt>')
+@admin_required
+def report_job_download(job_id, fmt):
+    job = report_jobs.get(job_id)
+    if job is None or job['status'] != 'done':
+        return jsonify({'error': 'Report is not ready.'}), 404
+    response = send_file(report_jobs.output_path(job['key'], fmt), download_name=f"{job['key']}.{fmt}",
+                         as_attachment=fmt == 'csv', max_age=31536000 if job['permanent'] else 0)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    # Finished reports for past days never change
+    response.cache_control.immutable = job['permanent']
+    return response
+
+
+@app.route('/admin/analytics')
+@admin_required
+@read_only
+def admin_analytics():
+    # Best first guesses and the hardest and easiest targets, by expected information
+    k = max(1, min(request.args.get('limit', 10, type=int), 100))
+    stats = get_analytics()
+    if stats is None:
+        return analytics_unavailable()
+    return jsonify({
+        'words': len(stats.words),
+        'openers': stats.openers(k),
+        'hardest': stats.ranked_targets(k, hardest=True),
+        'easiest': stats.ranked_targets(k, hardest=False),
+    })
+
+
+@app.route('/admin/analytics/replay/<int:game_id>')
+@admin_required
+@read_only
+def admin_analytics_replay(game_id):
+    # How each guess of a game compares with the best guess available at that point
+    game = db.session.query(GameSession).options(
+        joinedload(GameSession.target_word),
+        joinedload(GameSession.player),
+        selectinload(GameSession.guesses)
+    ).filter_by(id=game_id).first()
+    if game is None:
+        return jsonify({'error': 'Unknown game.'}), 404
+    stats = get_analytics()
+    if stats is None:
+        return analytics_unavailable()
+    steps = stats.replay(game.target_word.text, [guess.guessed_word for guess in game.guesses])
+    return jsonify({
+        'game_id': game.id,
+        'player': game.player.username if game.player else None,
+        'date_played': game.date_played.isoformat(),
+        'target_word': game.target_word.text,
+        'status': game.status,
+        'guesses': steps,
+    })
+
+
+@app.route('/admin/daily-words')
+@admin_required
+@read_only
+def admin_daily_words():
+    # The daily-word schedule with each day's results on its word
+    try:
+        start = date.fromisoformat(request.args.get('start', (date.today() - timedelta(days=30)).isoformat()))
+    except ValueError:
+        return jsonify({'error': 'start must be YYYY-MM-DD.'}), 400
+    days = max(1, min(request.args.get('days', 60, type=int), 366))
+    rows = db.session.execute(
+        db.select(DailyWord.date, Word.text, DailyWord.games_played, DailyWord.wins, DailyWord.win_guesses)
+        .join(Word, Word.id == DailyWord.word_id)
+        .where(DailyWord.date >= start, DailyWord.date < start + timedelta(days=days))
+        .order_by(DailyWord.date))
+    return jsonify({
+        'game_mode': app.config['GAME_MODE'],
+        'days': [{
+            'date': row.date.isoformat(),
+            'word': row.text,
+            'games_played': row.games_played,
+            'wins': row.wins,
+            'average_guesses_to_win': row.win_guesses / row.wins if row.wins else None,
+        } for row in rows],
+    })
+
+
 # --- Error Handlers (Optional) ---
 @app.errorhandler(404)
 def page_not_found(e):
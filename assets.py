@@ -0,0 +1,214 @@
+"""
+Static asset build and lookup.
+
+``build()`` minifies every ``.css`` and ``.js`` file in the static folder,
+writes it under a content-hashed name (``style.1a2b3c4d.css``) with
+pre-compressed ``.gz`` and, when the optional ``brotli`` package is
+installed, ``.br`` variants, and records the names in ``manifest.json``.
+Because a file's name changes whenever its content does, the built files can
+be cached by browsers forever.
+
+``AssetManifest`` maps source names to built ones for templates, and picks
+the best pre-compressed variant of a built file for a request's
+``Accept-Encoding``. Without a manifest (the build was never run) every
+lookup falls back to the raw file.
+
+The minifiers are deliberately conservative: they drop comments and
+insignificant whitespace but keep line breaks in scripts, so automatic
+semicolon insertion behaves exactly as in the source.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+MANIFEST = 'manifest.json'
+MINIFIABLE = ('.css', '.js')
+# Pre-compressed variants in order of preference: (Content-Encoding, suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+# Only the space after a colon: 'a :hover' and 'a:hover' are different selectors
+_CSS_COLON = re.compile(r':\s+')
+# After one of these (or at the start), a '/' in a script starts a regex, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^\n')
+
+
+def minify_css(source):
+    """Strip comments and whitespace that CSS does not need."""
+    css = _CSS_COMMENT.sub('', source)
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = _CSS_COLON.sub(':', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """
+    Strip comments, indentation, trailing spaces and blank lines from a
+    script, leaving strings, template literals and regex literals intact.
+    """
+    out = []
+    i, n = 0, len(source)
+    last = '\n'  # last significant character written
+    while i < n:
+        c = source[i]
+        if c in '\'"`':
+            end = i + 1
+            while end < n and source[end] != c:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            last, i = c, end + 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            out.append(' ')
+        elif c == '/' and last in _REGEX_PRECEDERS:
+            end, in_class = i + 1, False
+            while end < n and (source[end] != '/' or in_class) and source[end] != '\n':
+                if source[end] == '\\':
+                    end += 1
+                elif source[end] == '[':
+                    in_class = True
+                elif source[end] == ']':
+                    in_class = False
+                end += 1
+            out.append(source[i:end + 1])
+            last, i = '/', end + 1
+        else:
+            out.append(c)
+            if not c.isspace():
+                last = c
+            elif c == '\n':
+                last = '\n'
+            i += 1
+    lines = (line.strip() for line in ''.join(out).splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+def minify(name, source):
+    if name.endswith('.css'):
+        return minify_css(source)
+    if name.endswith('.js'):
+        return minify_js(source)
+    return source
+
+
+def hashed_name(name, data):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _write(path, data):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def build(static_dir, out_dir, use_brotli=True):
+    """
+    Build every minifiable asset in ``static_dir`` (not descending into
+    ``out_dir``) into ``out_dir``. Returns ``{name: (built name, {variant:
+    bytes})}`` for the files built; files left over from earlier builds are
+    removed once the new manifest is in place.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    out_dir_abs = os.path.abspath(out_dir)
+    manifest, sizes = {}, {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != out_dir_abs)
+        for filename in sorted(files):
+            if not filename.endswith(MINIFIABLE):
+                continue
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            with open(path, encoding='utf-8') as fh:
+                source = fh.read()
+            data = minify(name, source).encode('utf-8')
+            built = hashed_name(name, data)
+            target = os.path.join(out_dir, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            variants = {'source': len(source.encode('utf-8')), 'minified': len(data)}
+            _write(target, data)
+            # mtime=0 keeps the .gz bytes identical from build to build
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            _write(target + '.gz', compressed)
+            variants['gzip'] = len(compressed)
+            if use_brotli and brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                _write(target + '.br', compressed)
+                variants['br'] = len(compressed)
+            manifest[name] = built
+            sizes[name] = (built, variants)
+    _write(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    _remove_stale(out_dir, manifest)
+    return sizes
+
+
+def _remove_stale(out_dir, manifest):
+    keep = {MANIFEST}
+    for built in manifest.values():
+        keep.update(built + suffix for suffix in ('',) + tuple(s for _, s in ENCODINGS))
+    for root, _, files in os.walk(out_dir):
+        for filename in files:
+            rel = os.path.relpath(os.path.join(root, filename), out_dir).replace(os.sep, '/')
+            if rel not in keep:
+                os.remove(os.path.join(root, filename))
+
+
+class AssetManifest:
+    """Source name -> content-hashed name, read from ``out_dir/manifest.json``."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self._names = None
+        self._built = frozenset()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.out_dir, MANIFEST)) as fh:
+                self._names = json.load(fh)
+        except (OSError, ValueError):
+            self._names = {}
+        self._built = frozenset(self._names.values())
+        return self
+
+    @property
+    def names(self):
+        if self._names is None:
+            self.load()
+        return self._names
+
+    def lookup(self, name):
+        """The built name for ``name``, or None to serve the raw file."""
+        return self.names.get(name)
+
+    def is_built(self, filename):
+        if self._names is None:
+            self.load()
+        return filename in self._built
+
+    def variant(self, filename, accept_encodings):
+        """
+        ``(path, encoding)`` of the preferred pre-compressed copy of a built
+        file that the client accepts (``accept_encodings`` is a Werkzeug
+        ``Accept``, e.g. ``request.accept_encodings``), or ``(path, None)``
+        for the uncompressed one.
+        """
+        path = os.path.join(self.out_dir, filename)
+        for encoding, suffix in ENCODINGS:
+            if accept_encodings.quality(encoding) > 0 and os.path.exists(path + suffix):
+                return path + suffix, encoding
+        return path, None
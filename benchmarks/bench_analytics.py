@@ -0,0 +1,72 @@
+"""
+Cost of the solver analytics: full build, incremental update and replay.
+
+Scores every word against every word for N random words, once with the
+per-pair ``feedback.score`` (timed on a sample and extrapolated), then with
+``analytics.pattern_histograms`` on 1 and on ``--workers`` processes. Then
+builds a cache, adds ``--added`` words and times the incremental update
+against a full rebuild, checking that both give the same histograms.
+
+    python -m benchmarks.bench_analytics [--words 5000] [--added 100] [--workers N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import analytics
+import feedback
+from benchmarks.bench_word_pool import random_words
+
+SAMPLE_PAIRS = 200_000
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--added', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    words = random_words(args.words + args.added)
+    base, added = words[:args.words], words[args.words:]
+    pairs = args.words ** 2
+
+    rng = random.Random(0)
+    sample = [(rng.choice(base), rng.choice(base)) for _ in range(SAMPLE_PAIRS)]
+    seconds, _ = timed(lambda: [feedback.score(t, g) for t, g in sample])
+    print(f'{args.words:,} words, {pairs:,} pairs')
+    print(f'  per-pair score (extrapolated): {seconds / SAMPLE_PAIRS * pairs:8.2f}s')
+    for workers in sorted({1, args.workers}):
+        seconds, _ = timed(lambda: analytics.pattern_histograms(base, base, workers=workers))
+        print(f'  histograms, {workers:>2} process(es):    {seconds:8.2f}s ({pairs / seconds / 1e6:.1f}M pairs/s)')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'analytics.npz')
+        seconds, _ = timed(lambda: analytics.Analytics(path, workers=args.workers).build(base))
+        print(f'  build + save:                  {seconds:8.2f}s')
+        seconds, incremental = timed(lambda: analytics.Analytics(path, workers=args.workers).build(words))
+        print(f'  add {args.added} words ({incremental.last_build}):   {seconds:8.2f}s')
+        seconds, full = timed(lambda: analytics.Analytics(None, workers=args.workers).build(words))
+        print(f'  full rebuild:                  {seconds:8.2f}s')
+        order = [incremental.words.index(w) for w in full.words]
+        assert np.array_equal(incremental.histograms[order], full.histograms), 'incremental build differs'
+
+        seconds, _ = timed(lambda: incremental.difficulty)
+        print(f'  difficulty of every target:    {seconds:8.2f}s')
+        target = rng.choice(words)
+        guesses = [incremental.openers(1)[0]['word']] + rng.sample(words, 5)
+        seconds, _ = timed(lambda: incremental.replay(target, guesses))
+        print(f'  replay of a 6-guess game:      {seconds:8.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Starting games in 'random' vs 'daily' GAME_MODE, and scheduling cost.
+
+Seeds a temporary database, then has every player start a game in each
+mode through the Flask test client, reporting /play latency and how many
+statements read the ``word`` table to pick a target (the join that loads
+today's earlier games is not counted). Then times ``schedule_words``
+filling a year of days from a large word list.
+
+    python -m benchmarks.bench_daily_word [--players 200] [--words 100000]
+"""
+import argparse
+import random
+import re
+import time
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from benchmarks import seed
+from benchmarks.load import percentiles
+
+WORD_TABLE = re.compile(r'\b(FROM|JOIN)\s+word\b', re.IGNORECASE)
+
+
+def start_games(app, players):
+    timings = []
+    for player in players:
+        client = app.test_client()
+        client.post('/login', data={'username': seed.player_name(player), 'password': seed.PLAYER_PASSWORD})
+        start = time.perf_counter()
+        client.get('/play')
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--words', type=int, default=100_000, help='word list size for the schedule timing')
+    args = parser.parse_args()
+
+    with seed.use_temp_database():
+        seed.seed(users=args.players * 2, words=2000, games=0)
+        import app as app_module
+        from init_db import schedule_daily_words
+        from word_pool import schedule_words
+
+        app = app_module.app
+        app.config['WTF_CSRF_ENABLED'] = False
+        schedule_daily_words(days=30, seed=0)
+        word_reads = []
+
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def count_word_reads(conn, cursor, statement, parameters, context, executemany):
+            if WORD_TABLE.search(statement) and 'game_session' not in statement:
+                word_reads.append(statement)
+
+        modes = [('random', range(1, args.players + 1)), ('daily', range(args.players + 1, 2 * args.players + 1))]
+        for mode, players in modes:
+            app.config['GAME_MODE'] = mode
+            word_reads.clear()
+            timings = start_games(app, players)
+            summary = ', '.join(f'{k} {v * 1e3:.1f} ms' for k, v in percentiles(timings).items())
+            print(f'{mode:<6} new games: {len(word_reads)} word-table reads for {len(timings)} games | {summary}')
+
+    rng = random.Random(0)
+    word_ids = range(1, args.words + 1)
+    start = time.perf_counter()
+    scheduled = schedule_words(word_ids, date.today(), 365, no_repeat=365, rng=rng)
+    print(f'schedule: 365 days from {args.words:,} words in {(time.perf_counter() - start) * 1e3:.1f} ms')
+    start = time.perf_counter()
+    schedule_words(range(1, 366), date.today(), 365, no_repeat=365, rng=rng)
+    print(f'schedule: 365 days from 365 words (every pick constrained) in '
+          f'{(time.perf_counter() - start) * 1e3:.1f} ms')
+    assert len(set(scheduled.values())) == 365
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+/guess latency with and without the active-game cache.
+
+Seeds a temporary database, then plays full games for a set of players
+through the Flask test client, timing every /guess request.
+
+    python -m benchmarks.bench_guess [--players 100]
+"""
+import argparse
+import random
+import time
+
+from benchmarks import seed
+from benchmarks.load import percentiles
+
+
+def play_games(app, players, rng):
+    timings = []
+    for player in players:
+        client = app.test_client()
+        client.post('/login', data={'username': seed.player_name(player), 'password': seed.PLAYER_PASSWORD})
+        while True:
+            page = client.get('/play').data
+            game_id = page.split(b'"gameSessionId": ', 1)[1].split(b',', 1)[0].strip()
+            if game_id == b'null':
+                break
+            for _ in range(5):
+                word = ''.join(rng.choice('AEIOUXYZ') for _ in range(5))
+                start = time.perf_counter()
+                data = client.post('/guess', json={'game_session_id': int(game_id), 'word': word}).get_json()
+                timings.append(time.perf_counter() - start)
+                if data.get('game_over'):
+                    break
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=100)
+    args = parser.parse_args()
+
+    with seed.use_temp_database():
+        seed.seed(users=args.players * 2, words=2000, games=20000, days=90)
+        import app as app_module
+        from cache import MemoryCache, NullCache
+
+        app = app_module.app
+        app.config['WTF_CSRF_ENABLED'] = False
+        rng = random.Random(0)
+        backends = [('none', NullCache(), range(1, args.players + 1)),
+                    ('memory', MemoryCache(ttl=3600), range(args.players + 1, 2 * args.players + 1))]
+        for name, backend, players in backends:
+            app_module.game_cache = backend
+            timings = play_games(app, players, rng)
+            summary = ', '.join(f'{k} {v * 1e3:.3f} ms' for k, v in percentiles(timings).items())
+            print(f'game cache {name:>6}: {len(timings)} guesses | {summary}')
+
+
+if __name__ == '__main__':
+    main()
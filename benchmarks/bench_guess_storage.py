@@ -0,0 +1,108 @@
+"""
+Storage and decode cost of guess feedback as JSON text vs a pattern code.
+
+Builds two SQLite guess tables with the same N rows, one in the legacy
+layout (``result_json`` colour lists) and one with ``pattern`` codes, and
+reports bytes per row, the time to read every row and decode it to colours,
+and the time ``backfill_guess_patterns`` takes to convert the legacy table
+(which is then vacuumed and measured again).
+
+    python -m benchmarks.bench_guess_storage [--rows 10000000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, text
+
+import feedback
+from app import Guess
+from benchmarks.bench_word_pool import random_words
+from init_db import backfill_guess_patterns
+
+CHUNK = 100_000
+
+
+def sample_patterns(count, rng):
+    """Pattern codes with a realistic distribution: random guesses against random targets."""
+    words = random_words(2000, seed=rng.random())
+    return [feedback.score(rng.choice(words), rng.choice(words)) for _ in range(count)]
+
+
+def build(path, rows, patterns, legacy, rng):
+    engine = create_engine(f'sqlite:///{path}')
+    Guess.__table__.create(engine)
+    stamp = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        for start in range(0, rows, CHUNK):
+            batch = []
+            for i in range(start, min(rows, start + CHUNK)):
+                code = rng.choice(patterns)
+                batch.append({
+                    'game_session_id': i // 4 + 1, 'guessed_word': 'CRANE', 'timestamp': stamp,
+                    'pattern': None if legacy else code,
+                    'result_json': feedback.pattern_json(code) if legacy else '',
+                })
+            conn.execute(insert(Guess.__table__), batch)
+    return engine
+
+
+def size(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql('PRAGMA page_count').scalar() * conn.exec_driver_sql('PRAGMA page_size').scalar()
+
+
+def timed_decode(engine, column, decode):
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        for (value,) in conn.execute(text(f'SELECT {column} FROM guess')):
+            decode(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--batch-size', type=int, default=10000, help='backfill batch size')
+    args = parser.parse_args()
+    rng = random.Random(0)
+    patterns = sample_patterns(10_000, rng)
+    n = args.rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = build(os.path.join(tmp, 'legacy.db'), n, patterns, legacy=True, rng=random.Random(1))
+        compact = build(os.path.join(tmp, 'compact.db'), n, patterns, legacy=False, rng=random.Random(1))
+        legacy_size, compact_size = size(legacy), size(compact)
+        print(f'{n:,} guesses')
+        print(f'  storage   JSON text: {legacy_size / 2**20:9.1f} MiB ({legacy_size / n:5.1f} B/row)')
+        print(f'            pattern:   {compact_size / 2**20:9.1f} MiB ({compact_size / n:5.1f} B/row), '
+              f'{1 - compact_size / legacy_size:.0%} smaller')
+
+        timings = [
+            ('json.loads', timed_decode(legacy, 'result_json', json.loads)),
+            ('parse_result_json', timed_decode(legacy, 'result_json',
+                                               lambda t: feedback.decode(feedback.parse_result_json(t)))),
+            ('pattern code', timed_decode(compact, 'pattern', feedback.decode)),
+        ]
+        baseline = timings[0][1]
+        for label, seconds in timings:
+            print(f'  read + decode, {label:<18} {seconds:7.2f}s ({seconds / n * 1e9:6.0f} ns/row, '
+                  f'{baseline / seconds:4.1f}x)')
+
+        start = time.perf_counter()
+        converted = backfill_guess_patterns(legacy, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        with legacy.connect() as conn:
+            conn.exec_driver_sql('VACUUM')
+        print(f'  backfill: {converted:,} rows in {elapsed:.1f}s ({converted / elapsed:,.0f} rows/s), '
+              f'{size(legacy) / n:.1f} B/row after VACUUM')
+        legacy.dispose()
+        compact.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Guess writes per second in each GUESS_WRITE_MODE.
+
+Every mode runs in its own process (the app reads the mode when it is
+imported) against a freshly seeded database. Players are logged in and
+their games started before the clock starts; then ``--concurrency`` threads
+submit guesses as fast as they can, and the rate of accepted /guess requests
+is the write rate. Each round plays one game per player, up to the daily
+limit of three.
+
+    python -m benchmarks.bench_guess_writes --players 64 --concurrency 16
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import seed
+from benchmarks.load import GAME_ID_MARKER, percentiles
+
+MODES = ('direct', 'group', 'async')
+
+
+def login(client, player):
+    client.post('/login', data={'username': seed.player_name(player), 'password': seed.PLAYER_PASSWORD})
+
+
+def start_game(client):
+    """Open /play and return the in-progress game's id, or None at the daily limit."""
+    page = client.get('/play').data
+    if GAME_ID_MARKER not in page:
+        return None
+    game_id = page.split(GAME_ID_MARKER, 1)[1].split(b',', 1)[0].strip()
+    return None if game_id == b'null' else int(game_id)
+
+
+def random_guess(rng):
+    return ''.join(rng.choice('ABCDEFGHIKLMNOPRSTUY') for _ in range(5))
+
+
+def run_child(args):
+    """Benchmark the mode in GUESS_WRITE_MODE and print the result as one JSON line."""
+    with seed.use_temp_database():
+        seed.seed(users=args.players, words=args.words, games=0, seed_value=args.seed)
+        from app import app, db, guess_writer, Guess
+
+        app.config['WTF_CSRF_ENABLED'] = False
+        clients = {player: app.test_client() for player in range(1, args.players + 1)}
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda item: login(item[1], item[0]), clients.items()))
+
+        latencies = []
+        errors = 0
+        elapsed = 0.0
+        lock = threading.Lock()
+
+        def play_game(job):
+            nonlocal errors
+            client, game_id, rng = job
+            for _ in range(5):
+                start = time.perf_counter()
+                response = client.post('/guess', json={'game_session_id': game_id, 'word': random_guess(rng)})
+                seconds = time.perf_counter() - start
+                with lock:
+                    latencies.append(seconds)
+                    errors += response.status_code != 200
+                if response.status_code != 200 or response.get_json()['game_over']:
+                    break
+
+        rng = random.Random(args.seed)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for _ in range(args.rounds):
+                games = [(client, start_game(client), random.Random(rng.random())) for client in clients.values()]
+                games = [job for job in games if job[1] is not None]
+                if not games:
+                    break
+                start = time.perf_counter()
+                list(pool.map(play_game, games))
+                elapsed += time.perf_counter() - start
+        guess_writer.close()
+
+        with app.app_context():
+            persisted = db.session.query(Guess).count()
+        accepted = len(latencies) - errors
+        print(json.dumps({
+            'mode': app.config['GUESS_WRITE_MODE'],
+            'guesses': accepted,
+            'errors': errors,
+            'persisted': persisted,
+            'seconds': elapsed,
+            'writes_per_second': accepted / elapsed,
+            **{k: v * 1e3 for k, v in percentiles(latencies).items()},
+        }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=64)
+    parser.add_argument('--words', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=3, help='games per player (at most 3)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args)
+        return
+
+    child_args = [f'--players={args.players}', f'--words={args.words}', f'--concurrency={args.concurrency}',
+                  f'--rounds={args.rounds}', f'--seed={args.seed}', '--child']
+    results = []
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_guess_writes', *child_args],
+            env={**os.environ, 'GUESS_WRITE_MODE': mode}, capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<8}{'guesses':>9}{'errors':>8}{'persisted':>11}{'writes/s':>10}{'speedup':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    baseline = results[0]['writes_per_second']
+    for r in results:
+        print(f"{r['mode']:<8}{r['guesses']:>9}{r['errors']:>8}{r['persisted']:>11}{r['writes_per_second']:>10.1f}"
+              f"{r['writes_per_second'] / baseline:>8.2f}x{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
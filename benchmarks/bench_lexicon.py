@@ -0,0 +1,71 @@
+"""
+Memory and lookup cost of the guess lexicon compared with a Python set of strings.
+
+    python -m benchmarks.bench_lexicon [--sizes 100000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import lexicon
+from benchmarks.bench_word_pool import random_words
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def lookups(container, probes):
+    start = time.perf_counter()
+    for word in probes:
+        word in container
+    return (time.perf_counter() - start) / len(probes)
+
+
+def run(size):
+    words = random_words(size, seed=1)
+    # Half hits, half (mostly) misses; the lexicon, the set and the probes are all upper case,
+    # as guesses are by the time they are looked up
+    probes = [w.upper() for w in random.sample(words, 5000) + random_words(5000, seed=2)]
+
+    as_set, set_bytes = measure(lambda: {w.upper() for w in words})
+    packed, packed_bytes = measure(lambda: lexicon.Lexicon.from_words(words))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'words.txt')
+        with open(source, 'w') as fh:
+            fh.write('\n'.join(words))
+        mapped, mapped_heap = measure(lambda: lexicon.load(source))
+        file_bytes = os.path.getsize(os.path.join(tmp, 'words.lex'))
+        mapped_lookup = lookups(mapped, probes)
+        mapped._codes.release()
+        mapped._mapped.close()
+
+    per_100k = 100_000 / size
+    print(f"{size:>9,} words (per 100k words)")
+    print(f"  set of str      : {set_bytes * per_100k / 1024:9.1f} KiB heap"
+          f" | lookup {lookups(as_set, probes) * 1e6:5.2f} us")
+    print(f"  packed array    : {packed_bytes * per_100k / 1024:9.1f} KiB heap"
+          f" | lookup {lookups(packed, probes) * 1e6:5.2f} us")
+    print(f"  mmap'd .lex file: {mapped_heap * per_100k / 1024:9.1f} KiB heap,"
+          f" {file_bytes * per_100k / 1024:.1f} KiB shared"
+          f" | lookup {mapped_lookup * 1e6:5.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size)
+
+
+if __name__ == '__main__':
+    main()
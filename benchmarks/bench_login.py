@@ -0,0 +1,86 @@
+"""
+Login storm throughput, and the cost of throttled brute-force attempts.
+
+Seeds a temporary database, then logs every player in at once from
+``--concurrency`` threads, for each password hash method and hashing pool
+size, and reports logins per second and latency percentiles. Then one
+username is hit with a burst of wrong passwords to show how many attempts
+reach the hasher and what a rejected attempt costs.
+
+    python -m benchmarks.bench_login [--players 64] [--concurrency 16]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import seed
+from benchmarks.load import percentiles
+
+METHODS = ('pbkdf2:sha256:600000', 'pbkdf2:sha256:100000', 'scrypt:32768:8:1')
+
+
+def login_storm(app, players, concurrency):
+    def login(player):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/login', data={'username': seed.player_name(player),
+                                               'password': seed.PLAYER_PASSWORD})
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(login, players))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--burst', type=int, default=1000, help='wrong-password attempts on one username')
+    args = parser.parse_args()
+
+    with seed.use_temp_database():
+        seed.seed(users=args.players, words=200, games=0)
+        import app as app_module
+        from passwords import PasswordHasher
+
+        app = app_module.app
+        app.config['WTF_CSRF_ENABLED'] = False
+        db, User = app_module.db, app_module.User
+        players = range(1, args.players + 1)
+        cores = os.cpu_count() or 2
+        configured = app_module.password_hasher
+        for method in METHODS:
+            for workers in sorted({1, cores}):
+                hasher = PasswordHasher(method, workers=workers)
+                with app.app_context():
+                    # Every player shares one hash, made with the method under test
+                    db.session.execute(db.update(User).values(password_hash=hasher.hash(seed.PLAYER_PASSWORD)))
+                    db.session.commit()
+                app_module.password_hasher = hasher
+                app_module.login_throttle._windows.clear()
+                elapsed, results = login_storm(app, players, args.concurrency)
+                failed = sum(status != 302 for _, status in results)
+                summary = ', '.join(f'{k} {v * 1e3:.0f} ms' for k, v in percentiles([s for s, _ in results]).items())
+                print(f'{method:<22} {workers:>2} hash workers: {len(results) / elapsed:6.1f} logins/s, '
+                      f'{failed} failed | {summary}')
+                hasher.shutdown()
+        app_module.password_hasher = configured
+
+        throttle = app_module.login_throttle
+        throttle._windows.clear()
+        rejected_before = throttle.rejected
+        client = app.test_client()
+        start = time.perf_counter()
+        for _ in range(args.burst):
+            client.post('/login', data={'username': seed.player_name(1), 'password': 'wrong'})
+        elapsed = time.perf_counter() - start
+        rejected = throttle.rejected - rejected_before
+        print(f'brute force: {args.burst} wrong passwords in {elapsed:.2f}s, {args.burst - rejected} hashed, '
+              f'{rejected} rejected by the throttle ({elapsed / args.burst * 1e3:.2f} ms/attempt)')
+
+
+if __name__ == '__main__':
+    main()
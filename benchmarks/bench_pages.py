@@ -0,0 +1,88 @@
+"""
+Page weight and time to first byte, before and after the asset build and fragment cache.
+
+Seeds a temporary database, then for each setup ("before": raw files from
+static/ and no fragment cache; "after": the output of build_assets.py served
+pre-compressed and an in-memory fragment cache) reports:
+
+* page weight: the bytes a browser downloads for the page and the assets it
+  links, sent with ``Accept-Encoding: gzip, br``;
+* TTFB percentiles for the landing page and a past day's daily report
+  (first page), measured through the Flask test client.
+
+    python -m benchmarks.bench_pages [--games 20000] [--requests 200]
+"""
+import argparse
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks import seed
+from benchmarks.load import percentiles
+
+ASSET_LINK = re.compile(rb'(?:href|src)="(/(?:static|assets)/[^"]+)"')
+ACCEPT = {'Accept-Encoding': 'gzip, br'}
+
+
+def page_weight(client, url):
+    page = client.get(url, headers=ACCEPT)
+    total = len(page.data)
+    for link in ASSET_LINK.findall(page.data):
+        total += len(client.get(link.decode(), headers=ACCEPT).data)
+    return total
+
+
+def ttfb(client, url, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url, headers=ACCEPT, buffered=False)
+        next(iter(response.response), b'')
+        timings.append(time.perf_counter() - start)
+        response.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with seed.use_temp_database():
+        seed.seed(users=200, words=2000, games=args.games, days=args.days)
+        import app as app_module
+        import assets
+        from cache import MemoryCache, NullCache
+
+        app = app_module.app
+        app.config['WTF_CSRF_ENABLED'] = False
+        report = f'/admin/reports/daily?date={date.today() - timedelta(days=1)}'
+        with tempfile.TemporaryDirectory() as built, tempfile.TemporaryDirectory() as empty:
+            assets.build(app.static_folder, built)
+            setups = [
+                ('before', assets.AssetManifest(empty), NullCache()),
+                ('after', assets.AssetManifest(built), MemoryCache()),
+            ]
+            for label, manifest, fragments in setups:
+                app_module.asset_manifest = manifest
+                app.jinja_env.fragment_cache = fragments
+                anonymous = app.test_client()
+                player = app.test_client()
+                player.post('/login', data={'username': seed.player_name(1), 'password': seed.PLAYER_PASSWORD})
+                admin = app.test_client()
+                admin.post('/login', data={'username': seed.ADMIN_USERNAME, 'password': seed.ADMIN_PASSWORD})
+
+                print(f'{label}:')
+                print(f'  page weight  /      {page_weight(anonymous, "/"):7,} bytes')
+                print(f'               /play  {page_weight(player, "/play"):7,} bytes')
+                for name, client, url in (('/', anonymous, '/'), ('daily report', admin, report)):
+                    summary = ', '.join(f'{k} {v * 1e3:.2f} ms'
+                                        for k, v in percentiles(ttfb(client, url, args.requests)).items())
+                    print(f'  TTFB {name:<13} {summary}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Time the streaming bulk word import against the old row-by-row loop.
+
+Generates a word file (with some duplicates and invalid lines mixed in) and
+imports it into a fresh SQLite database.
+
+    python -m benchmarks.bench_word_import [--lines 1000000] [--rowwise-lines 10000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+
+import word_import
+from app import Word, WordVersion, install_word_version_triggers
+from benchmarks.bench_word_pool import random_words
+
+
+def write_word_file(path, lines, rng):
+    words = random_words(int(lines * 0.9), seed=rng.random())
+    with open(path, 'w') as fh:
+        for i in range(lines):
+            roll = rng.random()
+            if roll < 0.05:
+                fh.write('x1y2z\n')  # invalid
+            elif roll < 0.10:
+                fh.write(rng.choice(words).lower() + '\n')  # duplicate
+            else:
+                fh.write(words[i % len(words)] + '\n')
+
+
+def rowwise_import(engine, path):
+    """The loop init_db.py used to run: one SELECT and one INSERT per word."""
+    table = Word.__table__
+    with engine.begin() as conn:
+        for line in open(path):
+            word = line.strip().upper()
+            if conn.execute(select(table.c.id).where(table.c.text == word)).first() is None:
+                conn.execute(insert(table).values(text=word))
+
+
+def fresh_engine(tmp, name):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, name)}")
+    Word.__table__.create(engine)
+    WordVersion.__table__.create(engine)
+    with engine.begin() as conn:
+        install_word_version_triggers(None, conn)
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--rowwise-lines', type=int, default=10_000)
+    parser.add_argument('--batch-size', type=int, default=word_import.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, lines in (('row-by-row', args.rowwise_lines), ('bulk', args.rowwise_lines), ('bulk', args.lines)):
+            path = os.path.join(tmp, f'words-{lines}.txt')
+            if not os.path.exists(path):
+                write_word_file(path, lines, rng)
+            engine = fresh_engine(tmp, f'{label}-{lines}.db')
+            start = time.perf_counter()
+            if label == 'bulk':
+                stats = word_import.import_words(engine, Word.__table__, word_import.read_lines([path]),
+                                                 batch_size=args.batch_size)
+                detail = str(stats)
+            else:
+                rowwise_import(engine, path)
+                detail = 'one SELECT + INSERT per line'
+            elapsed = time.perf_counter() - start
+            print(f'{label:>10} {lines:>9,} lines: {elapsed:7.2f}s ({lines / elapsed:,.0f} lines/s) | {detail}')
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
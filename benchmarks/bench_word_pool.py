@@ -0,0 +1,76 @@
+"""
+Compare target selection with ``ORDER BY RANDOM()`` against the in-process WordPool.
+
+    python -m benchmarks.bench_word_pool [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+
+from app import Word
+from word_pool import WordPool
+
+
+def random_words(count, seed=0):
+    rng = random.Random(seed)
+    letters = string.ascii_uppercase
+    words = []
+    for n in rng.sample(range(26 ** 5), count):
+        chars = []
+        for _ in range(5):
+            n, r = divmod(n, 26)
+            chars.append(letters[r])
+        words.append(''.join(chars))
+    return words
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(size, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Word.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Word.__table__), [{'text': w} for w in random_words(size)])
+
+        with engine.connect() as conn:
+            query = select(Word).order_by(func.random()).limit(1)
+            order_by_random = timed(lambda: conn.execute(query).first(), repeat)
+
+            pool = WordPool()
+            load_start = time.perf_counter()
+            pool.load(conn.execute(select(Word.id, Word.text)))
+            load = time.perf_counter() - load_start
+
+        pick = timed(pool.pick, repeat * 1000)
+        exclude = set(random.sample(range(1, size + 1), min(size, 1000)))
+        pick_excluding = timed(lambda: pool.pick(exclude=exclude), repeat * 1000)
+        engine.dispose()
+
+    print(f"{size:>9,} words | ORDER BY RANDOM(): {order_by_random * 1e3:9.3f} ms"
+          f" | pool.pick: {pick * 1e6:6.2f} us"
+          f" | pick excluding 1k: {pick_excluding * 1e6:6.2f} us"
+          f" | pool load: {load * 1e3:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Kill the app mid-load and check what survived, for each GUESS_WRITE_MODE.
+
+A child process runs the app in the given mode and plays guesses from
+several threads, appending every acknowledged guess to a log as soon as its
+response arrives. Once enough guesses are acknowledged the child is killed
+with SIGKILL (no atexit drain), and the database is checked:
+
+* every game's ``guesses_made`` equals its number of guess rows, at most
+  five, and no game with five guesses is still in progress (each write
+  batch is one transaction);
+* the statistics rollups match the game history (``init_db.check_stats``);
+* in 'direct' and 'group' mode every acknowledged guess was persisted. In
+  'async' mode the acknowledged guesses that were still queued are lost;
+  their number is reported.
+
+Exits with status 1 if any check fails.
+
+    python -m benchmarks.check_guess_durability
+"""
+import argparse
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import seed
+from benchmarks.bench_guess_writes import MODES, login, random_guess, start_game
+
+
+def run_child(args):
+    """Play until killed, logging '<game id> <guesses made>' for every acknowledged guess."""
+    from app import app
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    log = open(args.ack_log, 'a', buffering=1)
+
+    def play(player):
+        client = app.test_client()
+        login(client, player)
+        rng = random.Random(player)
+        while (game_id := start_game(client)) is not None:
+            for _ in range(5):
+                response = client.post('/guess', json={'game_session_id': game_id, 'word': random_guess(rng)})
+                if response.status_code != 200:
+                    break
+                result = response.get_json()
+                log.write(f"{game_id} {result['guesses_made']}\n")
+                if result['game_over']:
+                    break
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(play, range(1, args.players + 1)))
+
+
+def check_database(acked):
+    """Return (failures, lost acknowledged guesses) for the database the app points at."""
+    import init_db
+    from app import app, db, GameSession, Guess
+
+    failures = []
+    with app.app_context():
+        db.session.remove()
+        counts = dict(db.session.query(Guess.game_session_id, db.func.count(Guess.id))
+                      .group_by(Guess.game_session_id).all())
+        games = db.session.query(GameSession.id, GameSession.guesses_made, GameSession.status).all()
+        for game_id, guesses_made, status in games:
+            stored = counts.get(game_id, 0)
+            if stored != (guesses_made or 0) or stored > 5:
+                failures.append(f'game {game_id}: guesses_made={guesses_made} but {stored} guess rows')
+            if status == 'in_progress' and stored >= 5:
+                failures.append(f'game {game_id}: five guesses but still in progress')
+        persisted = {game_id: guesses_made or 0 for game_id, guesses_made, _ in games}
+    lost = sum(1 for game_id, n in acked if persisted.get(game_id, 0) < n)
+    if init_db.check_stats():
+        failures.append('statistics rollups do not match the game history')
+    return failures, lost
+
+
+def run_mode(mode, args):
+    with seed.use_temp_database() as tmp:
+        seed.seed(users=args.players, words=args.words, games=0, seed_value=args.seed)
+        ack_log = os.path.join(tmp, 'acked.log')
+        child = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.check_guess_durability', '--child', f'--ack-log={ack_log}',
+             f'--players={args.players}', f'--concurrency={args.concurrency}'],
+            env={**os.environ, 'GUESS_WRITE_MODE': mode},
+        )
+        deadline = time.monotonic() + args.timeout
+        while child.poll() is None and time.monotonic() < deadline:
+            if os.path.exists(ack_log) and sum(1 for _ in open(ack_log)) >= args.kill_after:
+                break
+            time.sleep(0.01)
+        killed = child.poll() is None
+        if killed:
+            child.send_signal(signal.SIGKILL)
+        child.wait()
+
+        with open(ack_log) as fh:
+            acked = [tuple(map(int, line.split())) for line in fh if line.endswith('\n')]
+        failures, lost = check_database(acked)
+        if lost and mode != 'async':
+            failures.append(f'{lost} acknowledged guesses were lost')
+        print(f"{mode:<8} {'killed' if killed else 'finished'} after {len(acked)} acknowledged guesses, "
+              f"{lost} lost, {'OK' if not failures else 'FAILED'}")
+        for failure in failures:
+            print(f'  {failure}')
+        return not failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=32)
+    parser.add_argument('--words', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--kill-after', type=int, default=150, help='acknowledged guesses before SIGKILL')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--ack-log', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args)
+        return 0
+    # Each mode needs its own database, so check each one in a fresh process.
+    if len(args.modes) > 1:
+        ok = True
+        for mode in args.modes:
+            ok &= subprocess.run([sys.executable, '-m', 'benchmarks.check_guess_durability',
+                                  *(argv if argv is not None else sys.argv[1:]), '--modes', mode]).returncode == 0
+        return 0 if ok else 1
+    return 0 if run_mode(args.modes[0], args) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
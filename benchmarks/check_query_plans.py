@@ -0,0 +1,186 @@
+"""
+Query-plan and query-count regression check for the SQL the routes issue.
+
+Seeds a temporary database, drives each route through the Flask test client
+(in both game modes, with the solver analytics built and report exports run
+to completion) while recording the statements it runs, including those of
+the background report builders, then runs ``EXPLAIN QUERY PLAN`` on each
+one. Exits non-zero if any statement scans a whole table without an
+index, unless that (route, table) pair is listed in ALLOWED_SCANS, or if a
+hot-path request runs more statements (its ``X-Query-Count``) than its
+budget in QUERY_BUDGETS.
+
+    python -m benchmarks.check_query_plans
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks import seed
+
+# Full scans that are inherent to what the route returns.
+ALLOWED_SCANS = {
+    ('admin_dashboard', 'user'): 'the dashboard lists every user',
+    ('admin_words', 'word'): 'exports the whole dictionary',
+    ('play', 'word'): 'loads the in-process word pool',
+    ('admin_analytics', 'word'): 'checks the analytics cache against the whole dictionary',
+    ('admin_analytics_replay', 'word'): 'checks the analytics cache against the whole dictionary',
+}
+
+# Most statements a hot-path request may run.
+QUERY_BUDGETS = {
+    'play with a game in progress': 1,
+    'guess': 2,
+    # plus the DailyStat and UserStat upserts
+    'guess that ends the game': 4,
+}
+
+
+def record_statements(app, db):
+    import threading
+
+    from flask import has_request_context, request
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    statements = {}
+
+    # Every engine, so queries on the read-only reporting engine are checked too
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        if has_request_context():
+            endpoint = request.endpoint
+        elif threading.current_thread().name.startswith('report'):
+            endpoint = 'report job'
+        else:
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb in ('SELECT', 'UPDATE', 'DELETE', 'WITH'):
+            statements.setdefault((endpoint, statement), parameters)
+
+    return statements
+
+
+def get_ok(client, url, method='GET', **kwargs):
+    response = client.open(url, method=method, **kwargs)
+    if response.status_code >= 400:
+        raise RuntimeError(f'{method} {url} returned {response.status_code}')
+    return response
+
+
+def play_games(client, counts, games):
+    for _ in range(games):
+        page = client.get('/play')
+        marker = b'"gameSessionId": '
+        game_id = page.data.split(marker, 1)[1].split(b',', 1)[0].strip()
+        if game_id == b'null':
+            break
+        counts['play with a game in progress'].append(int(client.get('/play').headers['X-Query-Count']))
+        for word in ('CRANE', 'SLATE', 'PIOUS', 'MOUND', 'BRICK'):
+            response = client.post('/guess', json={'game_session_id': int(game_id), 'word': word})
+            data = response.get_json()
+            name = 'guess that ends the game' if data.get('game_over') else 'guess'
+            counts[name].append(int(response.headers['X-Query-Count']))
+            if data.get('game_over') or 'error' in data:
+                break
+
+
+def run_export(client, url):
+    job = get_ok(client, url, method='POST').get_json()
+    while job['status'] in ('queued', 'running'):
+        time.sleep(0.05)
+        job = get_ok(client, job['poll_url']).get_json()
+    if job['status'] != 'done':
+        raise RuntimeError(f"{url} finished as {job['status']}: {job['error']}")
+    for download in job['downloads'].values():
+        get_ok(client, download)
+
+
+def drive_routes(app, client):
+    """Request every route; returns the X-Query-Count of each hot-path request, by QUERY_BUDGETS name."""
+    counts = {name: [] for name in QUERY_BUDGETS}
+    today = date.today().isoformat()
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    get_ok(client, '/register', method='POST',
+           data={'username': 'NEWPLAYER', 'password': seed.PLAYER_PASSWORD, 'confirm_password': seed.PLAYER_PASSWORD})
+    client.post('/login', data={'username': seed.player_name(1), 'password': seed.PLAYER_PASSWORD})
+    play_games(client, counts, 2)
+    client.get('/logout')
+
+    # Daily mode picks from the schedule instead of the word pool
+    app.config['GAME_MODE'] = 'daily'
+    client.post('/login', data={'username': seed.player_name(2), 'password': seed.PLAYER_PASSWORD})
+    play_games(client, counts, 1)
+    client.get('/logout')
+    app.config['GAME_MODE'] = 'random'
+
+    client.post('/login', data={'username': seed.ADMIN_USERNAME, 'password': seed.ADMIN_PASSWORD})
+    for url in ('/admin', '/admin/words', '/admin/words?limit=50', '/admin/words?limit=50&after_id=100',
+                f'/admin/reports/daily?date={today}', f'/admin/reports/daily?date={yesterday}',
+                '/admin/reports/daily?page=2', '/admin/reports/user/2', '/admin/reports/user/2?page=2',
+                '/admin/analytics', '/admin/analytics/replay/1', '/admin/daily-words'):
+        get_ok(client, url)
+    run_export(client, f'/admin/reports/daily/export?date={yesterday}')
+    run_export(client, '/admin/reports/user/2/export')
+    client.get('/logout')
+    return counts
+
+
+def full_scans(connection, statement, parameters):
+    """Return the tables ``statement`` scans without an index."""
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    tables = []
+    for row in plan:
+        detail = row[-1]
+        if detail.startswith('SCAN ') and 'USING' not in detail:
+            # "SCAN game_session" / "SCAN game_session AS g"
+            tables.append(detail.split()[1])
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args(argv)
+
+    # The word-version check reads one row at most every few seconds; keep it from
+    # landing in a counted request on a slow run
+    os.environ.setdefault('WORD_VERSION_CHECK_INTERVAL', '3600')
+    with seed.use_temp_database():
+        seed.seed(users=20, words=300, games=2000, days=60)
+        import init_db
+        from app import app, db
+
+        init_db.schedule_daily_words(days=7, seed=0)
+        init_db.build_analytics()
+
+        app.config.update(WTF_CSRF_ENABLED=False, REPORT_PAGE_SIZE=10, QUERY_COUNT_HEADER=True)
+        with app.app_context():
+            statements = record_statements(app, db)
+        counts = drive_routes(app, app.test_client())
+
+        failures = 0
+        with app.app_context(), db.engine.connect() as connection:
+            for (endpoint, statement), parameters in sorted(statements.items(), key=str):
+                scans = full_scans(connection, statement, parameters)
+                bad = [t for t in scans if (endpoint, t) not in ALLOWED_SCANS]
+                if bad or args.verbose:
+                    status = 'FULL SCAN of ' + ', '.join(bad) if bad else 'ok'
+                    print(f'[{endpoint}] {status}\n    {" ".join(statement.split())}')
+                failures += bool(bad)
+            print(f'Checked {len(statements)} statements: {failures} with unexpected full table scans.')
+
+        for name, budget in QUERY_BUDGETS.items():
+            over = [n for n in counts[name] if n > budget]
+            if over or args.verbose:
+                print(f'{name}: {counts[name]} statements per request (budget {budget})')
+            failures += bool(over)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Load-test the app and report per-route throughput and latency percentiles.
+
+Seeds a temporary database with N users, M words and K historical games
+through the models, then runs concurrent virtual users against the app:
+
+* ``testclient``: each virtual user drives its own Flask test client
+  (measures the app without any HTTP server overhead);
+* ``wsgi``: the app is served by a threaded Werkzeug WSGI server on a local
+  port and virtual users talk real HTTP to it.
+
+Each player logs in, plays games until the daily limit, and guesses until
+each game ends; an admin user loads the dashboard, the word list and both
+reports. Results are printed and written as JSON so runs can be compared.
+
+    python -m benchmarks.load --users 50 --concurrency 8 --output results.json
+
+``--guess-write-mode`` runs the app with that GUESS_WRITE_MODE, so the /guess
+rows of runs in 'direct', 'group' and 'async' mode can be compared.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from benchmarks import seed
+
+GAME_ID_MARKER = b'"gameSessionId": '
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    ordered = sorted(samples)
+    return {f'p{p}': ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+
+class Recorder:
+    """Thread-safe collection of (route, seconds, status) samples."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.samples[route].append(seconds)
+            if status >= 400:
+                self.errors[route] += 1
+
+    def summary(self, wall_seconds):
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            routes[route] = {
+                'requests': len(samples),
+                'errors': self.errors[route],
+                'throughput_rps': len(samples) / wall_seconds,
+                'mean_ms': statistics.fmean(samples) * 1e3,
+                **{k: v * 1e3 for k, v in percentiles(samples).items()},
+            }
+        total = sum(len(s) for s in self.samples.values())
+        return {'wall_seconds': wall_seconds, 'total_requests': total,
+                'throughput_rps': total / wall_seconds, 'routes': routes}
+
+
+class TestClientSession:
+    """Virtual user backed by a Flask test client."""
+
+    def __init__(self, app, recorder):
+        self.client = app.test_client()
+        self.recorder = recorder
+
+    def request(self, route, method, path, data=None, json_body=None):
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, data=data, json=json_body)
+        self.recorder.record(route, time.perf_counter() - start, response.status_code)
+        return response.status_code, response.data
+
+
+class HttpSession:
+    """Virtual user talking HTTP to a running server, with its own cookie jar."""
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, route, method, path, data=None, json_body=None):
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        self.recorder.record(route, time.perf_counter() - start, status)
+        return status, payload
+
+
+def player_scenario(session, player, rng, games_per_user):
+    session.request('/login', 'POST', '/login',
+                    data={'username': seed.player_name(player), 'password': seed.PLAYER_PASSWORD})
+    for _ in range(games_per_user):
+        _, page = session.request('/play', 'GET', '/play')
+        if GAME_ID_MARKER not in page:
+            break
+        game_id = page.split(GAME_ID_MARKER, 1)[1].split(b',', 1)[0].strip()
+        if game_id == b'null':
+            break
+        for _ in range(5):
+            word = ''.join(rng.choice('ABCDEFGHIKLMNOPRSTUY') for _ in range(5))
+            _, body = session.request('/guess', 'POST', '/guess',
+                                      json_body={'game_session_id': int(game_id), 'word': word})
+            if json.loads(body).get('game_over', True):
+                break
+
+
+def admin_scenario(session, rng, users, rounds):
+    session.request('/login', 'POST', '/login',
+                    data={'username': seed.ADMIN_USERNAME, 'password': seed.ADMIN_PASSWORD})
+    for _ in range(rounds):
+        session.request('/admin', 'GET', '/admin')
+        session.request('/admin/words', 'GET', '/admin/words')
+        session.request('/admin/reports/daily', 'GET', f'/admin/reports/daily?date={date.today().isoformat()}')
+        session.request('/admin/reports/user/<id>', 'GET', f'/admin/reports/user/{rng.randint(2, users + 1)}')
+
+
+def run_mode(make_session, players, args):
+    """Run every player (and the admin rounds) with ``args.concurrency`` threads."""
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    jobs = [(player, random.Random(rng.random())) for player in players]
+
+    def run_player(job):
+        player, player_rng = job
+        player_scenario(make_session(recorder), player, player_rng, args.games_per_user)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        admin = pool.submit(admin_scenario, make_session(recorder), random.Random(args.seed),
+                            args.users, args.admin_rounds)
+        list(pool.map(run_player, jobs))
+        admin.result()
+    return recorder.summary(time.perf_counter() - start)
+
+
+def serve(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def print_summary(mode, summary):
+    print(f"\n{mode}: {summary['total_requests']} requests in {summary['wall_seconds']:.2f}s "
+          f"({summary['throughput_rps']:.1f} req/s)")
+    print(f"  {'route':<26}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, r in summary['routes'].items():
+        print(f"  {route:<26}{r['requests']:>9}{r['errors']:>8}{r['throughput_rps']:>9.1f}"
+              f"{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help='players to seed (N)')
+    parser.add_argument('--words', type=int, default=2000, help='words to seed (M)')
+    parser.add_argument('--games', type=int, default=10000, help='historical games to seed (K)')
+    parser.add_argument('--days', type=int, default=90, help='days of history to spread games over')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--games-per-user', type=int, default=3)
+    parser.add_argument('--admin-rounds', type=int, default=10)
+    parser.add_argument('--mode', choices=['testclient', 'wsgi', 'both'], default='both')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--guess-write-mode', choices=['direct', 'group', 'async'],
+                        help='GUESS_WRITE_MODE to run the app with (default: the environment)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    modes = ['testclient', 'wsgi'] if args.mode == 'both' else [args.mode]
+    # Every mode needs players who have not played today yet.
+    players_per_mode = args.users // len(modes)
+    if players_per_mode < 1:
+        parser.error('--users must be at least the number of modes')
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'config': vars(args),
+        },
+        'results': {},
+    }
+    if args.guess_write_mode:
+        os.environ['GUESS_WRITE_MODE'] = args.guess_write_mode
+    with seed.use_temp_database():
+        seed.seed(users=args.users, words=args.words, games=args.games, days=args.days,
+                  seed_value=args.seed)
+        from app import app, guess_writer
+
+        app.config['WTF_CSRF_ENABLED'] = False
+        results['meta']['guess_write_mode'] = app.config['GUESS_WRITE_MODE']
+        for i, mode in enumerate(modes):
+            players = range(i * players_per_mode + 1, (i + 1) * players_per_mode + 1)
+            if mode == 'testclient':
+                summary = run_mode(lambda recorder: TestClientSession(app, recorder), players, args)
+            else:
+                server, base_url = serve(app)
+                try:
+                    summary = run_mode(lambda recorder: HttpSession(base_url, recorder), players, args)
+                finally:
+                    server.shutdown()
+            results['results'][mode] = summary
+            print_summary(mode, summary)
+        guess_writer.close()
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Temporary databases populated through the models in app.py.
+
+``app`` reads DATABASE_URL when it is first imported, so call
+``use_temp_database()`` before anything imports it.
+"""
+import contextlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+PLAYER_PASSWORD = 'Passw0rd$'
+ADMIN_USERNAME = 'ADMIN'
+ADMIN_PASSWORD = 'Admin@123'
+
+
+@contextlib.contextmanager
+def use_temp_database():
+    """
+    Point DATABASE_URL at a fresh SQLite file for the duration of the block,
+    with exported reports and the analytics cache next to it.
+    """
+    if 'app' in sys.modules:
+        raise RuntimeError('app was imported before the temporary database was configured')
+    tmp = tempfile.mkdtemp(prefix='wordguess-')
+    settings = {
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'REPORT_DIR': os.path.join(tmp, 'reports'),
+        'ANALYTICS_CACHE_PATH': os.path.join(tmp, 'analytics.npz'),
+    }
+    previous = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        yield tmp
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def player_name(i):
+    return f'PLAYER{i}'
+
+
+def random_words(count, rng):
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(letters) for _ in range(5)))
+    return sorted(words)
+
+
+def seed(users=10, words=200, games=500, days=30, seed_value=0):
+    """
+    Create the schema and insert ``users`` players (plus an admin), ``words``
+    words and ``games`` finished games spread over the ``days`` days before
+    today, with their guesses, then rebuild the statistics rollups.
+    """
+    import feedback
+    import init_db
+    from app import app, db, User, Word, GameSession, Guess
+
+    rng = random.Random(seed_value)
+    with app.app_context():
+        db.create_all()
+        init_db.migrate()
+
+        # Hashing is deliberately slow; every player shares one hash.
+        player = User()
+        player.set_password(PLAYER_PASSWORD)
+        admin = User(username=ADMIN_USERNAME, is_admin=True)
+        admin.set_password(ADMIN_PASSWORD)
+        db.session.add(admin)
+        db.session.execute(db.insert(User), [
+            {'username': player_name(i), 'password_hash': player.password_hash, 'is_admin': False}
+            for i in range(1, users + 1)
+        ])
+        word_texts = random_words(words, rng)
+        db.session.execute(db.insert(Word), [{'text': w} for w in word_texts])
+        db.session.commit()
+
+        user_ids = [row[0] for row in db.session.execute(
+            db.select(User.id).where(User.is_admin.is_(False)))]
+        word_rows = db.session.execute(db.select(Word.id, Word.text)).all()
+        today = date.today()
+
+        session_rows, guess_rows = [], []
+        for game_id in range(1, games + 1):
+            word_id, target = rng.choice(word_rows)
+            played = today - timedelta(days=rng.randint(1, days))
+            won = rng.random() < 0.6
+            attempts = rng.randint(1, 5) if won else 5
+            session_rows.append({
+                'id': game_id, 'user_id': rng.choice(user_ids), 'target_word_id': word_id,
+                'date_played': played, 'guesses_made': attempts,
+                'status': 'won' if won else 'lost',
+            })
+            for n in range(attempts):
+                guessed = target if won and n == attempts - 1 else rng.choice(word_texts)
+                guess_rows.append({
+                    'game_session_id': game_id, 'guessed_word': guessed,
+                    'pattern': feedback.score(target, guessed),
+                    'timestamp': datetime.combine(played, datetime.min.time()) + timedelta(minutes=n),
+                })
+        if session_rows:
+            db.session.execute(db.insert(GameSession), session_rows)
+            db.session.execute(db.insert(Guess), guess_rows)
+        db.session.commit()
+
+    init_db.rebuild_stats()
@@ -0,0 +1,40 @@
+"""
+Builds the static assets for production.
+
+Minifies every CSS and JS file in static/ into ASSETS_DIR (default
+static/dist) under content-hashed names, with gzip (and, if the brotli
+package is installed, brotli) copies and a manifest.json. The app links and
+serves the built files from /assets/ whenever the manifest exists; re-run
+this after changing anything in static/.
+
+    python build_assets.py [--static static] [--out static/dist] [--no-brotli]
+"""
+import argparse
+import os
+import sys
+
+import assets
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build minified, fingerprinted and pre-compressed static assets.')
+    parser.add_argument('--static', default=os.path.join(ROOT, 'static'), help='source directory')
+    parser.add_argument('--out', default=os.environ.get('ASSETS_DIR') or os.path.join(ROOT, 'static', 'dist'),
+                        help='output directory')
+    parser.add_argument('--no-brotli', action='store_true', help='only write gzip copies')
+    args = parser.parse_args(argv)
+
+    built = assets.build(args.static, args.out, use_brotli=not args.no_brotli)
+    for name, (filename, sizes) in sorted(built.items()):
+        detail = ', '.join(f'{variant} {size:,}' for variant, size in sizes.items())
+        print(f'{name} -> {filename}: {detail} bytes')
+    if not args.no_brotli and assets.brotli is None:
+        print('brotli is not installed; only gzip copies were written.', file=sys.stderr)
+    print(f'Built {len(built)} assets into {args.out}.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Small key/value caches with a common backend interface.
+
+``MemoryCache`` is an in-process LRU with per-entry TTL and is the default.
+``RedisCache`` adapts any client with the redis-py ``get``/``set(ex=)``/
+``delete`` methods (a Redis server, or a Redis-compatible stand-in) so the
+cache can be shared between worker processes. ``NullCache`` never stores
+anything and turns caching off.
+
+Values must be JSON-serialisable so every backend can hold them.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheBackend:
+    """Interface implemented by every cache backend."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe LRU cache holding at most ``maxsize`` entries for ``ttl`` seconds each."""
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache(CacheBackend):
+    """Stores JSON values under ``prefix`` in a redis-py compatible client."""
+
+    def __init__(self, client, prefix='wordguess:', ttl=None):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_cache(backend, maxsize=10000, ttl=None, redis_url=None, prefix='wordguess:'):
+    """Build a cache from configuration: ``backend`` is 'memory', 'redis' or 'none'."""
+    if backend == 'memory':
+        return MemoryCache(maxsize=maxsize, ttl=ttl)
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The 'redis' cache backend requires the redis package") from e
+        return RedisCache(redis.Redis.from_url(redis_url), prefix=prefix, ttl=ttl)
+    if backend == 'none':
+        return NullCache()
+    raise ValueError(f'Unknown cache backend: {backend!r}')
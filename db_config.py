@@ -0,0 +1,93 @@
+"""
+Database engine configuration driven by environment variables.
+
+SQLite is tuned on every new connection with PRAGMAs: WAL journaling (readers
+and the writer no longer block each other, and a commit appends to the log
+instead of rewriting pages through a rollback journal), ``synchronous``,
+``busy_timeout`` (wait for the write lock instead of failing with "database is
+locked"), ``mmap_size`` and ``cache_size``.
+
+A second, read-only engine can be configured under the ``read`` bind. By
+default it is another pool on the same database whose connections have
+``query_only`` set. An in-memory SQLite database cannot be opened twice (a
+second engine would get a separate, empty database), so no read bind is
+registered for one. ``ReadRoutingSession`` sends every query of a session to
+the read engine, or the default one if there is none, once
+``use_read_engine(session)`` has been called.
+"""
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+READ_BIND = 'read'
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def _is_sqlite_memory(url):
+    url = make_url(url)
+    return is_sqlite(url) and url.database in (None, '', ':memory:')
+
+
+def engine_options(url, pool_size=None, max_overflow=None, pool_timeout=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``url``; pool settings left as None keep SQLAlchemy's defaults."""
+    options = {}
+    # In-memory SQLite uses a single static connection, which takes no pool settings
+    if not _is_sqlite_memory(url):
+        for key, value in (('pool_size', pool_size), ('max_overflow', max_overflow),
+                           ('pool_timeout', pool_timeout)):
+            if value is not None:
+                options[key] = value
+    return options
+
+
+def read_binds(url):
+    """SQLALCHEMY_BINDS for a read-only engine on ``url``; none for in-memory SQLite."""
+    if _is_sqlite_memory(url):
+        return {}
+    return {READ_BIND: url}
+
+
+def sqlite_pragmas(config, read_only=False):
+    """The PRAGMAs to run on each new connection, in order."""
+    pragmas = []
+    # The journal mode is stored in the database file, so only the writer sets it
+    if not read_only and config['SQLITE_JOURNAL_MODE']:
+        pragmas.append(('journal_mode', config['SQLITE_JOURNAL_MODE']))
+    pragmas += [
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+        ('cache_size', config['SQLITE_CACHE_SIZE']),
+    ]
+    if read_only:
+        pragmas.append(('query_only', 'ON'))
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run ``pragmas`` on every connection ``engine`` opens."""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def use_read_engine(session):
+    """Send the rest of ``session``'s queries to the read-only engine."""
+    session.info['use_read_engine'] = True
+
+
+class ReadRoutingSession(Session):
+    """Flask-SQLAlchemy session that can be switched over to the ``read`` bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('use_read_engine') and READ_BIND in self._db.engines:
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
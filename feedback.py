@@ -0,0 +1,232 @@
+"""
+Feedback engine for the word guess game.
+
+The colour feedback for a (target, guess) pair is packed into a single base-3
+integer, the "pattern code": position ``i`` contributes ``colour * 3**i`` where
+grey=0, orange=1 and green=2. There are only 243 possible codes, so decoding a
+code back to colours (or to the JSON stored on ``Guess`` rows) is a table
+lookup.
+
+Single pairs are scored in pure Python (that is the /guess hot path), whole
+batches of guesses against whole word lists are scored with NumPy array
+operations, and ``FeedbackEngine`` can hold a precomputed pattern matrix for
+the active dictionary.
+"""
+import json
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+WORD_LENGTH = 5
+GREY, ORANGE, GREEN = 0, 1, 2
+COLORS = ('grey', 'orange', 'green')
+NUM_PATTERNS = 3 ** WORD_LENGTH
+ALL_GREEN = NUM_PATTERNS - 1
+
+_POWERS = tuple(3 ** i for i in range(WORD_LENGTH))
+
+# Rows of the batch computation are chunked so the (guesses, targets, 5)
+# intermediate arrays stay around this many elements.
+_CHUNK_ELEMENTS = 4_000_000
+
+
+def _decode(code):
+    colors = []
+    for _ in range(WORD_LENGTH):
+        code, digit = divmod(code, 3)
+        colors.append(COLORS[digit])
+    return tuple(colors)
+
+
+_DECODED = tuple(_decode(code) for code in range(NUM_PATTERNS))
+_JSON = tuple(json.dumps(list(colors)) for colors in _DECODED)
+_JSON_TO_CODE = {text: code for code, text in enumerate(_JSON)}
+_COLOR_VALUE = {color: value for value, color in enumerate(COLORS)}
+
+
+@lru_cache(maxsize=65536)
+def score(target_word, guessed_word):
+    """Return the pattern code for ``guessed_word`` played against ``target_word``."""
+    code = 0
+    unmatched = []
+    for i in range(WORD_LENGTH):
+        if guessed_word[i] == target_word[i]:
+            code += GREEN * _POWERS[i]
+        else:
+            unmatched.append(target_word[i])
+
+    # Left to right, each non-green letter claims one unmatched target letter.
+    for i in range(WORD_LENGTH):
+        letter = guessed_word[i]
+        if letter != target_word[i] and letter in unmatched:
+            code += ORANGE * _POWERS[i]
+            unmatched.remove(letter)
+    return code
+
+
+def decode(code):
+    """Return the list of colour names for a pattern code."""
+    return list(_DECODED[code])
+
+
+def encode(colors):
+    """Return the pattern code for a list of colour names."""
+    return sum(_COLOR_VALUE[color] * _POWERS[i] for i, color in enumerate(colors))
+
+
+def pattern_json(code):
+    """Return the JSON colour list for a pattern code, as the legacy ``Guess.result_json`` held it."""
+    return _JSON[code]
+
+
+def parse_result_json(text):
+    """Return the pattern code for a stored ``Guess.result_json`` string."""
+    code = _JSON_TO_CODE.get(text)
+    if code is None:
+        code = encode(json.loads(text))
+    return code
+
+
+def words_to_array(words):
+    """Pack a sequence of 5-letter words into an ``(n, 5)`` uint8 array."""
+    if isinstance(words, np.ndarray):
+        return words
+    data = ''.join(words).upper().encode('ascii')
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, WORD_LENGTH)
+
+
+def _pattern_block(guesses, targets):
+    g = guesses[:, None, :]
+    t = targets[None, :, :]
+    green = g == t
+    codes = np.zeros(green.shape[:2], dtype=np.int16)
+    for i in range(WORD_LENGTH):
+        codes += green[..., i] * (GREEN * _POWERS[i])
+
+    not_green = ~green
+    for i in range(WORD_LENGTH):
+        letter = g[..., i]
+        # Copies of the letter still unmatched in the target...
+        available = np.zeros(codes.shape, dtype=np.int8)
+        for k in range(WORD_LENGTH):
+            available += (t[..., k] == letter) & not_green[..., k]
+        # ...minus those already claimed by earlier non-green guess letters.
+        claimed = np.zeros(codes.shape, dtype=np.int8)
+        for j in range(i):
+            claimed += (g[..., j] == letter) & not_green[..., j]
+        codes += (not_green[..., i] & (claimed < available)) * (ORANGE * _POWERS[i])
+    return codes.astype(np.uint8)
+
+
+def pattern_matrix(guesses, targets):
+    """
+    Score every guess against every target.
+
+    Returns a ``(len(guesses), len(targets))`` uint8 array where element
+    ``[g, t]`` equals ``score(targets[t], guesses[g])``.
+    """
+    guesses = words_to_array(guesses)
+    targets = words_to_array(targets)
+    out = np.empty((len(guesses), len(targets)), dtype=np.uint8)
+    step = max(1, _CHUNK_ELEMENTS // (max(1, len(targets)) * WORD_LENGTH))
+    for start in range(0, len(guesses), step):
+        out[start:start + step] = _pattern_block(guesses[start:start + step], targets)
+    return out
+
+
+class FeedbackEngine:
+    """
+    Scores guesses against an active dictionary.
+
+    With ``precompute=True`` the full dictionary x dictionary pattern matrix is
+    held in memory (one byte per pair) and pairs inside the dictionary are
+    answered by lookup; anything else falls back to ``score``.
+
+    ``build_async`` computes the matrix in a background thread and swaps it in
+    when it is done, so scoring never waits for it. ``invalidate`` drops the
+    dictionary and discards any build still running for it.
+    """
+
+    def __init__(self, words=(), precompute=False):
+        self.words = []
+        self._table = ({}, None)  # (index, matrix), replaced as one value
+        self._generation = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        if words:
+            self.load(words, precompute=precompute)
+
+    @property
+    def loaded(self):
+        return bool(self.words)
+
+    @property
+    def index(self):
+        return self._table[0]
+
+    @property
+    def matrix(self):
+        return self._table[1]
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def load(self, words, precompute=False, generation=None):
+        """
+        Replace the dictionary. With ``generation`` given, the result is
+        dropped if ``invalidate`` was called since that generation was read.
+        """
+        words = [w.upper() for w in words]
+        index = {w: i for i, w in enumerate(words)}
+        matrix = pattern_matrix(words, words) if precompute and words else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self.words, self._table = words, (index, matrix)
+        return True
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self.words, self._table = [], ({}, None)
+
+    def build_async(self, load_words, on_error=None):
+        """
+        Load ``load_words()`` with the precomputed matrix in a background
+        thread, unless a build is already running in this process.
+        """
+        with self._lock:
+            if self.building:
+                return False
+            generation = self._generation
+            self._thread = threading.Thread(target=self._build, args=(load_words, generation, on_error),
+                                            name='feedback-matrix', daemon=True)
+            self._thread.start()
+        return True
+
+    def _build(self, load_words, generation, on_error):
+        try:
+            self.load(load_words(), precompute=True, generation=generation)
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+
+    def score(self, target_word, guessed_word):
+        index, matrix = self._table
+        if matrix is not None:
+            g = index.get(guessed_word)
+            t = index.get(target_word)
+            if g is not None and t is not None:
+                return int(matrix[g, t])
+        return score(target_word, guessed_word)
+
+    def feedback(self, target_word, guessed_word):
+        return decode(self.score(target_word, guessed_word))
+
+    def batch(self, guesses, targets=None):
+        """Pattern matrix of ``guesses`` against ``targets`` (default: the dictionary)."""
+        if targets is None:
+            targets = self.words
+        return pattern_matrix(guesses, targets)
@@ -0,0 +1,84 @@
+"""
+Template fragment caching.
+
+``FragmentCacheExtension`` adds a ``{% cache key[, ttl] %}...{% endcache %}``
+tag. The rendered body is stored as HTML in the cache backend assigned to
+``environment.fragment_cache`` (any ``cache.CacheBackend``) under ``key``,
+which may be a string or a sequence of parts joined with ':'. A falsy key
+renders the body without caching, so one template can cache a section only
+when it can no longer change (e.g. a report for a day that is over).
+
+Work done only inside a cached block is skipped on a hit, provided the view
+hands it to the template as a ``Deferred`` instead of computing it up front.
+"""
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup, escape
+
+from cache import NullCache
+
+
+def fragment_key(key):
+    if isinstance(key, (list, tuple)):
+        key = ':'.join(str(part) for part in key)
+    return f'fragment:{key}'
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=NullCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        args.append(parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        if not key:
+            return caller()
+        cache = self.environment.fragment_cache
+        key = fragment_key(key)
+        html = cache.get(key)
+        if html is None:
+            html = str(caller())
+            cache.set(key, html, ttl)
+        return Markup(html)
+
+
+class Deferred:
+    """A value computed on first use; attribute access, iteration and printing pass through to it."""
+
+    def __init__(self, compute):
+        self._compute = compute
+        self._value = None
+        self._done = False
+
+    @property
+    def value(self):
+        if not self._done:
+            self._value = self._compute()
+            self._done = True
+        return self._value
+
+    def __getattr__(self, name):
+        return getattr(self.value, name)
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __str__(self):
+        return str(self.value)
+
+    def __html__(self):
+        return escape(self.value)
@@ -1,6 +1,16 @@
+import argparse
 import os
-from datetime import date
-from app import app, db, User, Word
+import random
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import and_, bindparam, case, distinct, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import feedback
+import word_import
+from app import app, db, analytics_engine, analytics_words, User, Word, GameSession, Guess, DailyStat, UserStat, DailyWord
+from word_pool import schedule_words
 
 def init_db():
     """
@@ -17,6 +27,7 @@ def init_db():
         # Creates all database tables according to the models (User and Word).
         db.create_all()
         print("Database tables created.")
+        migrate()
 
         # Add initial 20 words if they don't exist
         initial_words = [
@@ -26,15 +37,8 @@ def init_db():
             "PLANT", "QUEEN", "RIVER", "SHARK", "TIGER"
         ]
 
-        words_added_count = 0
-        for word_text in initial_words:
-            if not Word.query.filter_by(text=word_text).first():
-                word = Word(text=word_text)
-                db.session.add(word)
-                words_added_count += 1
-        
-        db.session.commit()
-        print(f"Added {words_added_count} new words to the database.")
+        stats = word_import.import_words(db.engine, Word.__table__, initial_words)
+        print(f"Added {stats.inserted} new words to the database.")
 
         # Create an admin user if they don't already exist
         admin_username = os.environ.get('ADMIN_USERNAME', 'admin').upper()
@@ -49,7 +53,282 @@ def init_db():
         else:
             print(f"Admin user '{admin_username}' already exists.")
 
+def import_words(paths, batch_size=word_import.DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Streams word files (one word per line, '-' for stdin) into the Word table.
+
+    Words are upper-cased, anything that is not 5 letters A-Z is skipped,
+    duplicates are dropped and existing words are left alone. Progress is
+    reported on stderr after every batch.
+    """
+    def progress(stats):
+        print(f"\r{stats.lines} lines read, {stats.inserted} inserted", end='', file=sys.stderr, flush=True)
+
+    sources = [sys.stdin if path == '-' else path for path in paths]
+    with app.app_context():
+        db.create_all()
+        stats = word_import.import_words(db.engine, Word.__table__, word_import.read_lines(sources),
+                                         batch_size=batch_size, dry_run=dry_run, progress=progress)
+    print(file=sys.stderr)
+    print(f"{'Dry run: ' if dry_run else ''}{stats}")
+    return stats
+
+
+def migrate():
+    """
+    Brings an existing database up to date with the models.
+
+    db.create_all() only creates missing tables, so nullable columns and
+    indexes added to existing tables are created here. Safe to run repeatedly.
+    """
+    with app.app_context():
+        db.create_all()
+        # create_all() installs the word_version triggers even when every table exists
+        inspector = db.inspect(db.engine)
+        added = created = 0
+        for table in db.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    column_type = column.type.compile(db.engine.dialect)
+                    db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    added += 1
+            db.session.commit()
+            existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(db.engine)
+                    created += 1
+        if created:
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+        print(f"Migration complete: added {added} columns, created {created} indexes.")
+
+
+def backfill_guess_patterns(engine, batch_size=10000, progress=None):
+    """
+    Converts legacy ``Guess.result_json`` rows to ``Guess.pattern`` codes.
+
+    Works through the table in primary-key order, one short transaction per
+    batch, so it can run while the app is serving: readers are never
+    blocked and each write lock is held only for one batch. Converted rows
+    have their JSON cleared. Returns the number of rows converted.
+    """
+    guess = Guess.__table__
+    find = (select(guess.c.id, guess.c.result_json)
+            .where(guess.c.id > bindparam('after'), guess.c.pattern.is_(None))
+            .order_by(guess.c.id).limit(batch_size))
+    convert = (update(guess).where(guess.c.id == bindparam('row_id'))
+               .values(pattern=bindparam('code'), result_json=''))
+    converted = last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(find, {'after': last_id}).all()
+            if not rows:
+                break
+            conn.execute(convert, [
+                {'row_id': row_id, 'code': feedback.parse_result_json(result_json)}
+                for row_id, result_json in rows
+            ])
+        converted += len(rows)
+        last_id = rows[-1][0]
+        if progress:
+            progress(converted)
+    return converted
+
+
+def migrate_guess_patterns(batch_size=10000):
+    """Runs backfill_guess_patterns on the app database, reporting progress on stderr."""
+    def progress(converted):
+        print(f"\r{converted} guesses converted", end='', file=sys.stderr, flush=True)
+
+    with app.app_context():
+        migrate()
+        converted = backfill_guess_patterns(db.engine, batch_size, progress=progress)
+    print(file=sys.stderr)
+    print(f"Converted {converted} guesses to pattern codes.")
+    return converted
+
+
+def build_analytics():
+    """
+    Brings the solver analytics cache up to date with the word list, so the
+    admin analytics pages never have to compute it on a request.
+    """
+    with app.app_context():
+        stats = analytics_engine.build(analytics_words())
+    print(f"Analytics for {len(stats.words)} words ({stats.last_build}) in {analytics_engine.path}.")
+    for opener in stats.openers(5):
+        print(f"  {opener['word']}: {opener['entropy']:.3f} bits, "
+              f"{opener['expected_remaining']:.1f} candidates expected")
+
+
+def schedule_daily_words(start=None, days=180, no_repeat=365, seed=None):
+    """
+    Fills the DailyWord schedule for ``days`` days from ``start`` (default
+    today). Days already scheduled keep their word, so this can be re-run
+    to extend the schedule; new days avoid any word used in the previous
+    ``no_repeat`` days.
+    """
+    start = start or date.today()
+    end = start + timedelta(days=days)
+    rng = random.Random(seed) if seed is not None else random.Random()
+    with app.app_context():
+        db.create_all()
+        word_ids = db.session.execute(select(Word.id).order_by(Word.id)).scalars().all()
+        existing = dict(db.session.execute(
+            select(DailyWord.date, DailyWord.word_id)
+            .where(DailyWord.date > start - timedelta(days=no_repeat),
+                   DailyWord.date < end + timedelta(days=no_repeat))).all())
+        scheduled = schedule_words(word_ids, start, days, existing, no_repeat=no_repeat, rng=rng)
+        if scheduled:
+            db.session.execute(sqlite_insert(DailyWord).on_conflict_do_nothing(),
+                               [{'date': day, 'word_id': word_id} for day, word_id in sorted(scheduled.items())])
+            db.session.commit()
+    print(f"Scheduled {len(scheduled)} new daily words from {start} to {end - timedelta(days=1)} "
+          f"({days - len(scheduled)} days were already scheduled).")
+    if len(word_ids) < no_repeat:
+        print(f"Only {len(word_ids)} words: words can repeat after {len(word_ids)} days.")
+    return scheduled
+
+
+def _daily_stats_select():
+    return select(
+        GameSession.date_played,
+        func.count(distinct(GameSession.user_id)),
+        func.count(GameSession.id),
+        func.sum(case((GameSession.status == 'won', 1), else_=0)),
+        func.sum(case((GameSession.status == 'lost', 1), else_=0)),
+    ).group_by(GameSession.date_played)
+
+
+def _user_stats_select():
+    return select(
+        GameSession.user_id,
+        func.count(GameSession.id),
+        func.sum(case((GameSession.status == 'won', 1), else_=0)),
+        func.sum(case((GameSession.status == 'lost', 1), else_=0)),
+        func.max(GameSession.date_played),
+    ).group_by(GameSession.user_id)
+
+
+def _daily_word_stats_select():
+    # Only games on each day's scheduled word count
+    won = GameSession.status == 'won'
+    return select(
+        DailyWord.date,
+        func.count(GameSession.id),
+        func.coalesce(func.sum(case((won, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((won, GameSession.guesses_made), else_=0)), 0),
+    ).outerjoin(GameSession, and_(GameSession.date_played == DailyWord.date,
+                                  GameSession.target_word_id == DailyWord.word_id)
+    ).group_by(DailyWord.date)
+
+
+_DAILY_COLUMNS = ['date', 'users_played', 'games_played', 'total_wins', 'total_losses']
+_DAILY_WORD_COLUMNS = ['date', 'games_played', 'wins', 'win_guesses']
+_USER_COLUMNS = ['user_id', 'words_tried', 'correct_guesses', 'games_lost', 'last_played']
+
+
+def rebuild_stats():
+    """
+    Recomputes the DailyStat and UserStat rollups and, in 'daily' GAME_MODE,
+    the DailyWord results from the full game history.
+
+    Run this once after upgrading an existing database, or whenever
+    check_stats() reports a mismatch.
+    """
+    with app.app_context():
+        db.create_all()
+        db.session.execute(DailyStat.__table__.delete())
+        db.session.execute(UserStat.__table__.delete())
+        db.session.execute(DailyStat.__table__.insert().from_select(_DAILY_COLUMNS, _daily_stats_select()))
+        db.session.execute(UserStat.__table__.insert().from_select(_USER_COLUMNS, _user_stats_select()))
+        # DailyWord rows are the schedule, so their counters are updated in place; they are
+        # only kept up to date while the app runs in 'daily' GAME_MODE
+        daily_words = []
+        if app.config['GAME_MODE'] == 'daily':
+            daily_words = [dict(zip(['day'] + _DAILY_WORD_COLUMNS[1:], row))
+                           for row in db.session.execute(_daily_word_stats_select())]
+        if daily_words:
+            db.session.execute(
+                update(DailyWord.__table__).where(DailyWord.__table__.c.date == bindparam('day')),
+                daily_words)
+        db.session.commit()
+        print(f"Rebuilt stats for {DailyStat.query.count()} days and {UserStat.query.count()} users.")
+
+
+def check_stats():
+    """
+    Compares the rollups with a fresh aggregation of the game history.
+
+    Prints every mismatching row and returns the number of mismatches.
+    """
+    mismatches = 0
+    with app.app_context():
+        checks = [
+            (DailyStat, _DAILY_COLUMNS, _daily_stats_select()),
+            (UserStat, _USER_COLUMNS, _user_stats_select()),
+        ]
+        if app.config['GAME_MODE'] == 'daily':
+            checks.append((DailyWord, _DAILY_WORD_COLUMNS, _daily_word_stats_select()))
+        for model, columns, expected_select in checks:
+            expected = {row[0]: tuple(row) for row in db.session.execute(expected_select)}
+            stored = {
+                row[0]: tuple(row)
+                for row in db.session.execute(select(*(model.__table__.c[c] for c in columns)))
+            }
+            for key in sorted(expected.keys() | stored.keys(), key=str):
+                if expected.get(key) != stored.get(key):
+                    mismatches += 1
+                    print(f"{model.__name__} {key}: stored {stored.get(key)}, expected {expected.get(key)}")
+    print(f"Stats check finished with {mismatches} mismatches.")
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Word Guess database management.')
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('init', help='create tables, initial words and the admin user (default)')
+    import_parser = commands.add_parser('import-words', help='bulk import word files')
+    import_parser.add_argument('paths', nargs='+', metavar='FILE', help="word file, or '-' for stdin")
+    import_parser.add_argument('--batch-size', type=int, default=word_import.DEFAULT_BATCH_SIZE)
+    import_parser.add_argument('--dry-run', action='store_true', help='validate without writing')
+    commands.add_parser('migrate', help='upgrade an existing database (missing tables, columns and indexes)')
+    patterns_parser = commands.add_parser('migrate-guess-patterns',
+                                          help='convert stored JSON guess feedback to pattern codes, online')
+    patterns_parser.add_argument('--batch-size', type=int, default=10000)
+    schedule_parser = commands.add_parser('schedule', help='schedule daily words ahead (GAME_MODE=daily)')
+    schedule_parser.add_argument('--start', type=date.fromisoformat, help='first day, YYYY-MM-DD (default today)')
+    schedule_parser.add_argument('--days', type=int, default=180)
+    schedule_parser.add_argument('--no-repeat', type=int, default=365, metavar='DAYS',
+                                 help='days before a word may be scheduled again')
+    schedule_parser.add_argument('--seed', help='make the schedule reproducible')
+    commands.add_parser('build-analytics', help='compute or update the cached solver analytics')
+    commands.add_parser('rebuild-stats', help='recompute the daily/user statistics rollups')
+    commands.add_parser('check-stats', help='verify the statistics rollups against the game history')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import-words':
+        import_words(args.paths, batch_size=args.batch_size, dry_run=args.dry_run)
+    elif args.command == 'migrate':
+        migrate()
+    elif args.command == 'migrate-guess-patterns':
+        migrate_guess_patterns(batch_size=args.batch_size)
+    elif args.command == 'schedule':
+        schedule_daily_words(args.start, days=args.days, no_repeat=args.no_repeat, seed=args.seed)
+    elif args.command == 'build-analytics':
+        build_analytics()
+    elif args.command == 'rebuild-stats':
+        rebuild_stats()
+    elif args.command == 'check-stats':
+        return 1 if check_stats() else 0
+    else:
+        init_db()
+        print("Database initialization and population process complete.")
+    return 0
+
+
 if __name__ == '__main__':
     # This block ensures the function is called only when the script is executed directly.
-    init_db()
-    print("Database initialization and population process complete.")
+    sys.exit(main())
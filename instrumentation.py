@@ -0,0 +1,227 @@
+"""
+Opt-in per-request instrumentation.
+
+For every request this records wall time, the number of SQL statements
+(read from the per-request ``g.query_count`` counter the app keeps) and the
+time spent in them (SQLAlchemy engine events), the time spent rendering
+templates (Flask's template signals) and the time spent in named hot-path
+functions wrapped with ``timer()``. Totals are aggregated in process and
+rendered in the Prometheus text exposition format by ``render_prometheus()``.
+
+Optionally a fraction of requests is run under cProfile and the stats are
+dumped to a directory for offline analysis with ``pstats`` or snakeviz.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Instrumentation:
+
+    def __init__(self, prefix='wordguess'):
+        self.prefix = prefix
+        self.enabled = False
+        self.profile_rate = 0.0
+        self.profile_dir = None
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)            # (endpoint, method, status) -> count
+        self._duration_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._duration = defaultdict(lambda: [0, 0.0])  # endpoint -> [count, seconds]
+        self._sql = defaultdict(lambda: [0, 0.0])       # endpoint -> [statements, seconds]
+        self._templates = defaultdict(lambda: [0, 0.0])  # template -> [renders, seconds]
+        self._functions = defaultdict(lambda: [0, 0.0])  # function -> [calls, seconds]
+        self._gauges = []
+        self._counters = []
+
+    def init_app(self, app):
+        self.enabled = True
+        self.profile_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self.profile_dir = app.config.get('PROFILE_DIR')
+        if self.profile_rate and self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    # --- collection ---
+    def _before_request(self):
+        g.instr_start = time.perf_counter()
+        g.instr_query_count_start = g.get('query_count', 0)
+        g.instr_sql_time = 0.0
+        g.instr_render_start = []
+        if self.profile_rate and self.profile_dir and random.random() < self.profile_rate:
+            g.instr_profiler = cProfile.Profile()
+            g.instr_profiler.enable()
+
+    def _after_request(self, response):
+        start = g.pop('instr_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unknown'
+
+        with self._lock:
+            self._requests[(endpoint, request.method, response.status_code)] += 1
+            duration = self._duration[endpoint]
+            duration[0] += 1
+            duration[1] += elapsed
+            buckets = self._duration_buckets[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if elapsed <= bound:
+                    buckets[i] += 1
+            sql = self._sql[endpoint]
+            sql[0] += g.get('query_count', 0) - g.get('instr_query_count_start', 0)
+            sql[1] += g.get('instr_sql_time', 0.0)
+        return response
+
+    def _teardown_request(self, exc):
+        # Runs even when the view raised, so a profiler is never left running
+        profiler = g.pop('instr_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            endpoint = request.endpoint or 'unknown'
+            name = f'{endpoint}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{threading.get_ident()}.prof'
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('instr_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('instr_query_start')
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        if has_request_context() and 'instr_start' in g:
+            g.instr_sql_time += elapsed
+
+    def _before_render(self, sender, template, context, **extra):
+        if has_request_context() and 'instr_render_start' in g:
+            g.instr_render_start.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if has_request_context() and g.get('instr_render_start'):
+            self._add(self._templates, template.name or 'string', time.perf_counter() - g.instr_render_start.pop())
+
+    def _add(self, table, key, seconds):
+        with self._lock:
+            entry = table[key]
+            entry[0] += 1
+            entry[1] += seconds
+
+    def timer(self, name):
+        """Context manager timing a block under the function label ``name``."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(self._functions, name, time.perf_counter() - start)
+
+    def gauge(self, name, help_text, callback):
+        """Export ``callback()`` (a number, or a {label_value: number} dict) as a gauge."""
+        self._gauges.append((name, help_text, callback))
+
+    def counter(self, name, help_text, callback, label='name'):
+        """
+        Export ``callback()``, a running total (or a {``label`` value: total}
+        dict), as the counter ``<name>_total``.
+        """
+        self._counters.append((name, help_text, callback, label))
+
+    # --- export ---
+    def render_prometheus(self):
+        p = self.prefix
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {p}_{name} {help_text}')
+            lines.append(f'# TYPE {p}_{name} {kind}')
+
+        with self._lock:
+            requests = dict(self._requests)
+            durations = {k: list(v) for k, v in self._duration.items()}
+            buckets = {k: list(v) for k, v in self._duration_buckets.items()}
+            sql = {k: list(v) for k, v in self._sql.items()}
+            templates = {k: list(v) for k, v in self._templates.items()}
+            functions = {k: list(v) for k, v in self._functions.items()}
+
+        family('requests_total', 'counter', 'Requests handled.')
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f'{p}_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+        family('request_duration_seconds', 'histogram', 'Request wall time.')
+        for endpoint, (count, total) in sorted(durations.items()):
+            for bound, n in zip(DURATION_BUCKETS, buckets[endpoint]):
+                lines.append(f'{p}_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=bound)} {n}')
+            lines.append(f'{p}_request_duration_seconds_bucket{_labels(endpoint=endpoint, le="+Inf")} {count}')
+            lines.append(f'{p}_request_duration_seconds_sum{_labels(endpoint=endpoint)} {total}')
+            lines.append(f'{p}_request_duration_seconds_count{_labels(endpoint=endpoint)} {count}')
+
+        family('sql_statements_total', 'counter', 'SQL statements executed while handling requests.')
+        for endpoint, (count, _) in sorted(sql.items()):
+            lines.append(f'{p}_sql_statements_total{_labels(endpoint=endpoint)} {count}')
+        family('sql_seconds_total', 'counter', 'Time spent executing SQL while handling requests.')
+        for endpoint, (_, seconds) in sorted(sql.items()):
+            lines.append(f'{p}_sql_seconds_total{_labels(endpoint=endpoint)} {seconds}')
+
+        family('template_renders_total', 'counter', 'Template renders.')
+        for name, (count, _) in sorted(templates.items()):
+            lines.append(f'{p}_template_renders_total{_labels(template=name)} {count}')
+        family('template_render_seconds_total', 'counter', 'Time spent rendering templates.')
+        for name, (_, seconds) in sorted(templates.items()):
+            lines.append(f'{p}_template_render_seconds_total{_labels(template=name)} {seconds}')
+
+        family('function_calls_total', 'counter', 'Calls of instrumented hot-path functions.')
+        for name, (count, _) in sorted(functions.items()):
+            lines.append(f'{p}_function_calls_total{_labels(function=name)} {count}')
+        family('function_seconds_total', 'counter', 'Time spent in instrumented hot-path functions.')
+        for name, (_, seconds) in sorted(functions.items()):
+            lines.append(f'{p}_function_seconds_total{_labels(function=name)} {seconds}')
+
+        for name, help_text, callback in self._gauges:
+            family(name, 'gauge', help_text)
+            value = callback()
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f'{p}_{name}{_labels(name=label)} {v}')
+            else:
+                lines.append(f'{p}_{name} {value}')
+
+        for name, help_text, callback, label_name in self._counters:
+            family(f'{name}_total', 'counter', help_text)
+            value = callback()
+            if isinstance(value, dict):
+                for label, v in sorted(value.items()):
+                    lines.append(f'{p}_{name}_total{_labels(**{label_name: label})} {v}')
+            else:
+                lines.append(f'{p}_{name}_total {value}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,141 @@
+"""
+Compact membership index of the words accepted as guesses.
+
+Each 5-letter word is packed into 25 bits (5 bits per letter) and the codes
+are kept as a sorted array of unsigned 32-bit integers, 4 bytes per word.
+Lookups are a binary search, O(log n).
+
+A plain text word list (one word per line) is compiled once into a binary
+file next to it (``<name>.lex``). That file is memory-mapped read-only, so
+every worker process on the host shares the same page-cache pages instead of
+holding its own copy, and it is cached per process for as long as the source
+file is unchanged.
+"""
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+
+WORD_LENGTH = 5
+MAGIC = b'WGLX'
+_HEADER = struct.Struct('<4sI')  # magic, word count (8 bytes keeps the codes aligned)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def pack(word):
+    """Pack an upper-case 5-letter word into a 25-bit integer, or None if it is not one."""
+    if len(word) != WORD_LENGTH:
+        return None
+    code = 0
+    for ch in word:
+        value = ord(ch) - 64  # 'A' -> 1
+        if not 1 <= value <= 26:
+            return None
+        code = (code << 5) | value
+    return code
+
+
+def unpack(code):
+    letters = []
+    for _ in range(WORD_LENGTH):
+        code, value = divmod(code, 32)
+        letters.append(chr(value + 64))
+    return ''.join(reversed(letters))
+
+
+def read_words(path):
+    """Yield normalised words from a text word list, one per line."""
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            word = line.strip().upper()
+            if word and not word.startswith('#'):
+                yield word
+
+
+def build(words):
+    """Return the sorted, de-duplicated code array for an iterable of words."""
+    codes = sorted({code for code in map(pack, words) if code is not None})
+    return array('I', codes)
+
+
+def compile_lexicon(source, target):
+    """Compile the text word list ``source`` into the binary lexicon file ``target``."""
+    codes = build(read_words(source))
+    tmp = f'{target}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as fh:
+        fh.write(_HEADER.pack(MAGIC, len(codes)))
+        fh.write(codes.tobytes())
+    os.replace(tmp, target)
+    return len(codes)
+
+
+class Lexicon:
+
+    def __init__(self, codes, mapped=None):
+        self._codes = codes
+        self._mapped = mapped
+
+    @classmethod
+    def from_words(cls, words):
+        return cls(build(words))
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a compiled lexicon file."""
+        with open(path, 'rb') as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(mapped)
+        if magic != MAGIC or len(mapped) != _HEADER.size + 4 * count:
+            mapped.close()
+            raise ValueError(f'{path} is not a compiled lexicon file')
+        codes = memoryview(mapped)[_HEADER.size:].cast('I')
+        return cls(codes, mapped)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __contains__(self, word):
+        code = pack(word)
+        if code is None:
+            return False
+        i = bisect_left(self._codes, code)
+        return i < len(self._codes) and self._codes[i] == code
+
+    def __iter__(self):
+        return (unpack(code) for code in self._codes)
+
+    @property
+    def nbytes(self):
+        return len(self._codes) * 4
+
+
+def load(path):
+    """
+    Return the shared Lexicon for ``path``.
+
+    ``path`` may be a compiled ``.lex`` file or a text word list; a text list
+    is compiled to ``<path>.lex`` when that file is missing or older than it.
+    """
+    source_mtime = os.stat(path).st_mtime_ns
+    key = (os.path.abspath(path), source_mtime)
+    lexicon = _cache.get(key)
+    if lexicon is not None:
+        return lexicon
+
+    with _cache_lock:
+        lexicon = _cache.get(key)
+        if lexicon is None:
+            compiled = path
+            if not path.endswith('.lex'):
+                compiled = f'{os.path.splitext(path)[0]}.lex'
+                if not os.path.exists(compiled) or os.stat(compiled).st_mtime_ns < source_mtime:
+                    compile_lexicon(path, compiled)
+            lexicon = Lexicon.open(compiled)
+            for old in [k for k in _cache if k[0] == key[0]]:
+                del _cache[old]
+            _cache[key] = lexicon
+    return lexicon
@@ -0,0 +1,127 @@
+"""
+Password hashing on a bounded worker pool, and login throttling.
+
+``PasswordHasher`` hashes and verifies with Werkzeug's password helpers
+using a configurable method and cost (e.g. ``pbkdf2:sha256:600000`` or
+``scrypt:32768:8:1``). The work runs on a fixed number of threads (hashlib
+releases the GIL while hashing, so they use separate cores), so a login
+storm can occupy at most that many cores; once ``max_pending`` requests are
+waiting, new ones are turned away with ``HasherBusy`` instead of queueing
+without bound. ``needs_rehash()`` tells whether a stored hash was made with
+other parameters and should be replaced after a successful login.
+
+``LoginThrottle`` counts login attempts per username and per client address
+in fixed time windows, so a brute-force burst is rejected before the user is
+looked up or any hashing happens.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many password operations are already waiting for a worker."""
+
+
+class PasswordHasher:
+
+    def __init__(self, method='pbkdf2', workers=4, max_pending=64):
+        self.method = method
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._prefix = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    @property
+    def prefix(self):
+        """The ``method:params`` part of hashes made with the current settings."""
+        if self._prefix is None:
+            # Werkzeug fills in default parameters, so ask it rather than parse ``method``
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._prefix
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.prefix
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LoginThrottle:
+    """
+    Allows at most ``per_user`` attempts per username and ``per_ip`` failed
+    attempts per address every ``window`` seconds. Successful logins do not
+    count against the address, so many users behind one address can all log
+    in while a password-guessing address is still cut off.
+    """
+
+    def __init__(self, per_user=5, per_ip=20, window=300, maxsize=100000):
+        self.per_user = per_user
+        self.per_ip = per_ip
+        self.window = window
+        self.maxsize = maxsize
+        self.rejected = 0
+        self._windows = OrderedDict()  # key -> [window start, attempts]
+        self._lock = threading.Lock()
+
+    def _count(self, key, limit, now, count=True):
+        """
+        Count an attempt against ``key`` (only check the limit if not
+        ``count``); return seconds until allowed again, or 0.
+        """
+        entry = self._windows.get(key)
+        if entry is None or now - entry[0] >= self.window:
+            entry = self._windows[key] = [now, 0]
+        self._windows.move_to_end(key)
+        if entry[1] >= limit:
+            return entry[0] + self.window - now
+        if count:
+            entry[1] += 1
+        return 0
+
+    def _trim(self):
+        while len(self._windows) > self.maxsize:
+            self._windows.popitem(last=False)
+
+    def attempt(self, username, address):
+        """
+        Record a login attempt. Returns 0 if it may proceed, otherwise the
+        number of seconds until the username or address may try again. The
+        address is only charged once the attempt turns out to have failed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = (self._count(f'ip:{address}', self.per_ip, now, count=False)
+                    or self._count(f'user:{username}', self.per_user, now))
+            self._trim()
+            if wait:
+                self.rejected += 1
+            return wait
+
+    def failed(self, address):
+        """Count a wrong password against the address it came from."""
+        with self._lock:
+            self._count(f'ip:{address}', self.per_ip, time.monotonic())
+            self._trim()
+
+    def succeeded(self, username):
+        """Forget a username's attempts after it logs in."""
+        with self._lock:
+            self._windows.pop(f'user:{username}', None)
@@ -0,0 +1,215 @@
+"""
+Background report jobs.
+
+Admins enqueue a report and get a job id back at once; a pool of worker
+threads builds the report by streaming rows from the database and writes it
+to a cache directory as CSV and pre-rendered HTML, named after the report's
+key (e.g. ``daily-2025-01-31``). Job state is kept as small JSON files in
+the same directory, so any worker process can answer a poll.
+
+Outputs are written to temporary files and renamed into place, so readers
+never see a half-written report. A report marked permanent (e.g. the daily
+report for a day that is over) is served from the cache from then on;
+others are rebuilt once they are older than ``ttl`` seconds.
+
+Asking for a report that is already cached returns the job that built it
+(the latest job per report key is recorded next to the job files) instead
+of writing a new record. Finished job records are deleted ``job_ttl``
+seconds after they finish.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'html')
+JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class RowStream:
+    """
+    Lazily produced rows standing in for a one-page Pagination in templates:
+    iterable once, truthy when ``total`` rows are expected, never paged.
+    """
+    pages = 1
+
+    def __init__(self, rows, total):
+        self.rows = rows
+        self.total = total
+
+    @property
+    def items(self):
+        return self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __bool__(self):
+        return self.total > 0
+
+
+class ReportJobs:
+
+    def __init__(self, directory, workers=2, ttl=300, job_ttl=86400):
+        self.directory = directory
+        self.ttl = ttl
+        self.job_ttl = job_ttl
+        self._purged_at = 0
+        self._builders = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report')
+        self._inflight = {}  # report key -> job id
+        self._lock = threading.Lock()
+
+    def register(self, kind, builder):
+        """
+        ``builder(params, paths)`` writes the report described by ``params``
+        to ``paths[fmt]`` for every format in FORMATS.
+        """
+        self._builders[kind] = builder
+
+    # --- paths and job records ---
+    def output_path(self, key, fmt):
+        return os.path.join(self.directory, f'{key}.{fmt}')
+
+    def _job_path(self, job_id):
+        return os.path.join(self.directory, 'jobs', f'{job_id}.json')
+
+    def _latest_path(self, key):
+        return os.path.join(self.directory, 'jobs', 'latest', f'{key}.id')
+
+    def _latest(self, key):
+        """The record of the last finished job for ``key``, if it is still kept."""
+        try:
+            with open(self._latest_path(key)) as fh:
+                job = self.get(fh.read().strip())
+        except FileNotFoundError:
+            return None
+        return job if job is not None and job['status'] == 'done' else None
+
+    def _set_latest(self, job):
+        path = self._latest_path(job['key'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp, 'w') as fh:
+            fh.write(job['id'])
+        os.replace(tmp, path)
+
+    def purge(self):
+        """Delete finished job records older than ``job_ttl``; returns how many were removed."""
+        jobs_dir = os.path.join(self.directory, 'jobs')
+        cutoff = time.time() - self.job_ttl
+        removed = 0
+        try:
+            names = os.listdir(jobs_dir)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            job_id = name[:-len('.json')]
+            if not name.endswith('.json') or not JOB_ID_RE.match(job_id):
+                continue
+            job = self.get(job_id)
+            if job is not None and job['finished'] is not None and job['finished'] < cutoff:
+                with self._lock:
+                    if job_id in self._inflight.values():
+                        continue
+                try:
+                    os.remove(self._job_path(job_id))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def _save(self, job):
+        path = self._job_path(job['id'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(job, fh)
+        os.replace(tmp, path)
+
+    def get(self, job_id):
+        """The job's record, or None for an unknown id."""
+        if not JOB_ID_RE.match(job_id):
+            return None
+        try:
+            with open(self._job_path(job_id)) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def is_cached(self, key, permanent):
+        """Whether every output for ``key`` exists and may still be served."""
+        try:
+            built = min(os.path.getmtime(self.output_path(key, fmt)) for fmt in FORMATS)
+        except OSError:
+            return False
+        return permanent or time.time() - built < self.ttl
+
+    # --- running ---
+    def enqueue(self, kind, key, params, permanent=False):
+        """
+        Start building report ``key`` unless a usable copy is cached or a
+        build is already running in this process. Returns the job record.
+        """
+        now = time.time()
+        if now - self._purged_at > min(self.job_ttl, 3600):
+            # At most hourly, so a busy admin page doesn't list the directory every time
+            self._purged_at = now
+            self.purge()
+        with self._lock:
+            running = self._inflight.get(key)
+            if running is not None:
+                return self.get(running)
+            if self.is_cached(key, permanent):
+                latest = self._latest(key)
+                if latest is not None:
+                    return latest
+            job = {
+                'id': uuid.uuid4().hex, 'kind': kind, 'key': key, 'params': params,
+                'permanent': permanent, 'created': time.time(), 'finished': None, 'error': None,
+            }
+            if self.is_cached(key, permanent):
+                # Built by a job whose record has expired (or by another install); record it once
+                job.update(status='done', cached=True, finished=job['created'])
+                self._save(job)
+                self._set_latest(job)
+                return job
+            job.update(status='queued', cached=False)
+            self._save(job)
+            self._inflight[key] = job['id']
+        self._executor.submit(self._run, dict(job))
+        return job
+
+    def _run(self, job):
+        job['status'] = 'running'
+        self._save(job)
+        suffix = f".{job['id']}.tmp"
+        paths = {fmt: self.output_path(job['key'], fmt) + suffix for fmt in FORMATS}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._builders[job['kind']](job['params'], paths)
+            for fmt, tmp in paths.items():
+                os.replace(tmp, self.output_path(job['key'], fmt))
+            job['status'] = 'done'
+        except Exception as e:
+            logger.exception('report job %s (%s) failed', job['id'], job['key'])
+            job.update(status='failed', error=str(e))
+            for tmp in paths.values():
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        finally:
+            job['finished'] = time.time()
+            self._save(job)
+            if job['status'] == 'done':
+                self._set_latest(job)
+            with self._lock:
+                self._inflight.pop(job['key'], None)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,105 @@
+"""
+Streaming bulk import of word lists into the ``word`` table.
+
+Input is processed lazily, one line at a time, through a chain of
+generators: read -> normalise -> validate -> de-duplicate -> batch. Each batch
+is written with a single ``executemany`` of ``INSERT ... ON CONFLICT DO
+NOTHING`` in its own transaction, so words already in the table are skipped
+by SQLite instead of being looked up one by one, and a large file never
+holds the write lock for long.
+"""
+import io
+import re
+from itertools import islice
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+WORD_RE = re.compile(r'^[A-Z]{5}$')
+DEFAULT_BATCH_SIZE = 5000
+
+
+class ImportStats:
+
+    def __init__(self):
+        self.lines = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.valid = 0
+        self.inserted = 0
+        self.batches = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return (f'{self.lines} lines, {self.valid} unique valid words, {self.invalid} invalid, '
+                f'{self.duplicates} duplicates, {self.inserted} inserted in {self.batches} batches')
+
+
+def read_lines(sources):
+    """Yield lines from file paths or open text/binary file objects."""
+    for source in sources:
+        if isinstance(source, str):
+            with open(source, encoding='utf-8', errors='replace') as fh:
+                yield from fh
+        else:
+            if isinstance(source.read(0), bytes):
+                source = io.TextIOWrapper(source, encoding='utf-8', errors='replace')
+            yield from source
+
+
+def normalize(lines, stats):
+    for line in lines:
+        stats.lines += 1
+        word = line.strip().upper()
+        if word and not word.startswith('#'):
+            yield word
+
+
+def validate(words, stats):
+    for word in words:
+        if WORD_RE.match(word):
+            yield word
+        else:
+            stats.invalid += 1
+
+
+def dedupe(words, stats):
+    seen = set()
+    for word in words:
+        if word in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(word)
+        stats.valid += 1
+        yield word
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_words(engine, table, lines, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, progress=None):
+    """
+    Import words from an iterable of ``lines`` (see ``read_lines``) into
+    ``table`` (the Word table) through ``engine``.
+
+    With ``dry_run`` the input is read and checked but nothing is written.
+    ``progress`` is called with the running ImportStats after every batch.
+    Returns the final ImportStats.
+    """
+    stats = ImportStats()
+    words = dedupe(validate(normalize(lines, stats), stats), stats)
+    stmt = sqlite_insert(table).on_conflict_do_nothing(index_elements=[table.c.text])
+
+    for batch in batched(words, batch_size):
+        stats.batches += 1
+        if not dry_run:
+            with engine.begin() as conn:
+                # rowcount of an executemany sums the rows each insert changed
+                stats.inserted += conn.execute(stmt, [{'text': word} for word in batch]).rowcount
+        if progress:
+            progress(stats)
+    return stats
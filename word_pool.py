@@ -0,0 +1,217 @@
+"""
+In-process index of the playable words.
+
+The pool keeps the word ids in a dense array and the texts packed five bytes
+per word, so picking a target is a random index into memory instead of an
+``ORDER BY RANDOM()`` scan of the ``word`` table. It is loaded once and
+reloaded only after ``invalidate()``, which the app calls when the ``Word``
+table changes (in this process, or in another one, as seen through the
+word-version counter). One thread reloads while the others keep picking
+from the previous list.
+
+In daily-word mode every player gets the same target, taken from a
+precomputed schedule. ``DailyTarget`` holds the current day's word and
+reloads it only when the date changes, and ``schedule_words`` fills the
+schedule so that no word comes back within a given number of days.
+
+``VersionCheck`` lets every worker notice a changed word list cheaply: it
+reads a version counter (bumped by triggers on the ``word`` table) at most
+once per interval and reports when it has moved.
+"""
+import random
+import threading
+import time
+from array import array
+from collections import Counter, deque
+from datetime import date, timedelta
+
+WORD_LENGTH = 5
+
+# Random probes before falling back to scanning for a non-excluded word.
+_MAX_PROBES = 16
+
+
+class WordPool:
+
+    def __init__(self):
+        self._ids = array('q')
+        self._texts = b''
+        self._version = 0
+        self._loaded_version = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def stale(self):
+        return self._loaded_version != self._version
+
+    def invalidate(self):
+        self._version += 1
+
+    def load(self, rows, version=None):
+        """
+        Replace the pool with ``(id, text)`` rows. With ``version`` given (the
+        one the rows were read at) the pool stays stale if it was
+        invalidated since.
+        """
+        ids = array('q')
+        texts = bytearray()
+        for word_id, text in rows:
+            ids.append(word_id)
+            texts += text.encode('ascii')
+        with self._lock:
+            self._ids = ids
+            self._texts = bytes(texts)
+            self._loaded_version = self._version if version is None else version
+
+    def ensure_loaded(self, loader):
+        """
+        Reload from ``loader()`` if the pool is stale. Only one thread
+        reloads; the others wait for it if the pool is empty and otherwise
+        go on with the previous words.
+        """
+        if not self.stale or not self._reload_lock.acquire(blocking=not self._ids):
+            return self
+        try:
+            if self.stale:
+                version = self._version
+                self.load(loader(), version=version)
+        finally:
+            self._reload_lock.release()
+        return self
+
+    def pick(self, exclude=(), rng=None):
+        """
+        Return a random ``(id, text)``, or None if the pool has nothing left.
+
+        ``exclude`` is a collection of word ids that must not be returned
+        (e.g. words the user has already played). A few random probes are
+        tried first; only when nearly every word is excluded does this fall
+        back to scanning the pool.
+        """
+        rng = rng or random
+        with self._lock:
+            ids, texts = self._ids, self._texts
+        count = len(ids)
+        if not count:
+            return None
+
+        for _ in range(_MAX_PROBES):
+            index = rng.randrange(count)
+            if ids[index] not in exclude:
+                break
+        else:
+            remaining = [i for i, word_id in enumerate(ids) if word_id not in exclude]
+            if not remaining:
+                return None
+            index = rng.choice(remaining)
+
+        start = index * WORD_LENGTH
+        return ids[index], texts[start:start + WORD_LENGTH].decode('ascii')
+
+
+def daily_rng(seed, day, *parts):
+    """Deterministic generator for ``seed`` on ``day``, optionally per user/game."""
+    key = ':'.join(str(p) for p in (seed, day.isoformat()) + parts)
+    return random.Random(key)
+
+
+class DailyTarget:
+    """The day's shared ``(id, text)`` target, loaded once per date."""
+
+    def __init__(self):
+        self._day = None
+        self._word = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._day = None
+
+    def get(self, loader, today=None):
+        """
+        Return the target for ``today``, calling ``loader(day)`` only when
+        the date has changed since the last load. Nothing is remembered if
+        the loader finds no word.
+        """
+        today = today or date.today()
+        if self._day != today:
+            with self._lock:
+                if self._day != today:
+                    self._word = loader(today)
+                    self._day = today if self._word is not None else None
+                    return self._word
+        return self._word
+
+
+class VersionCheck:
+    """Calls ``on_change`` when a version number moves, reading it at most once per ``interval`` seconds."""
+
+    def __init__(self, interval=5):
+        self.interval = interval
+        self._version = None
+        self._checked_at = None
+
+    def force(self):
+        """Read the version on the next check, however recent the last one was."""
+        self._checked_at = None
+
+    def check(self, read_version, on_change):
+        """
+        Compare ``read_version()`` with the last value seen if the interval
+        has passed, calling ``on_change()`` if it differs. The first value
+        read is only remembered.
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.interval:
+            return False
+        self._checked_at = now
+        version, self._version = self._version, read_version()
+        if version is None or version == self._version:
+            return False
+        on_change()
+        return True
+
+
+def schedule_words(word_ids, start, days, existing=None, no_repeat=365, rng=None):
+    """
+    Choose a word id for each day from ``start`` that has none yet.
+
+    ``existing`` maps already scheduled dates (including those within
+    ``no_repeat`` days either side of the range) to word ids; they are kept
+    as they are. A new day never gets a word scheduled within ``no_repeat - 1``
+    days before or after it, or, when there are fewer words than that,
+    within ``len(word_ids) - 1`` days. Returns a dict of the newly scheduled
+    dates.
+    """
+    rng = rng or random
+    ids = list(word_ids)
+    existing = existing or {}
+    if not ids:
+        return {}
+    window = max(0, min(no_repeat, len(ids)) - 1)
+    recent = deque()
+    in_window = Counter()
+    scheduled = {}
+    for offset in range(-window, days):
+        day = start + timedelta(days=offset)
+        word_id = existing.get(day)
+        if word_id is None and offset >= 0:
+            # Days already scheduled after this one constrain it too
+            ahead = {existing.get(day + timedelta(days=k)) for k in range(1, window + 1)}
+            for _ in range(_MAX_PROBES):
+                word_id = rng.choice(ids)
+                if not in_window[word_id] and word_id not in ahead:
+                    break
+            else:
+                allowed = [i for i in ids if not in_window[i] and i not in ahead]
+                # Only possible when the days around it already use every word
+                word_id = rng.choice(allowed or ids)
+            scheduled[day] = word_id
+        recent.append(word_id)
+        in_window[word_id] += 1
+        if len(recent) > window:
+            in_window[recent.popleft()] -= 1
+    return scheduled
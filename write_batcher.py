@@ -0,0 +1,157 @@
+"""
+Background group-commit writer.
+
+Items submitted from request threads are queued and written by a single
+background thread, which hands them to a ``flush(items)`` callback in
+batches of at most ``max_batch`` items, waiting at most ``max_delay``
+seconds for a batch to fill. The callback is expected to write a whole batch
+in one transaction, so many requests share one commit (and one fsync)
+instead of each paying for their own.
+
+``submit()`` returns a ``threading.Event``-like ticket; callers that need
+durability wait on it (group commit), callers that don't return right away
+(asynchronous writes, which are lost if the process dies before the batch is
+committed). ``close()`` drains the queue before the thread stops.
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+# Queued by flush(): carries no data, its ticket completes with the batch it lands in.
+_BARRIER = object()
+
+
+class Ticket:
+    """Completion handle for one submitted item."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+
+    def _finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for the item's batch to commit; re-raise the batch's error if it failed."""
+        if not self._done.wait(timeout):
+            raise TimeoutError('write was not committed in time')
+        if self.error is not None:
+            raise self.error
+
+
+class WriteBatcher:
+
+    def __init__(self, flush, max_batch=64, max_delay=0.005, max_queue=10000, name='write-batcher'):
+        self._flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.batches = 0
+        self.items = 0
+        self.failed = 0
+
+    @property
+    def pending(self):
+        """Items submitted but not written yet."""
+        return self._pending
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, item):
+        """Queue ``item`` for writing and return its Ticket. Blocks while the queue is full."""
+        if not self.running:
+            self.start()
+        ticket = Ticket()
+        with self._lock:
+            self._pending += 1
+        self._queue.put((item, ticket))
+        return ticket
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far has been written."""
+        if not self.running or not self._pending:
+            return
+        self.submit(_BARRIER).wait(timeout)
+
+    def close(self, timeout=None):
+        """Write everything still queued, then stop the background thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put((_STOP, None))
+            self._thread = None
+        thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item, ticket = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [(item, ticket)]
+            stop = False
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item, ticket = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append((item, ticket))
+            self._write(batch)
+            if stop:
+                # Drain whatever arrived before close() so nothing is dropped.
+                rest = []
+                while True:
+                    try:
+                        rest.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for start in range(0, len(rest), self.max_batch):
+                    self._write([(i, t) for i, t in rest[start:start + self.max_batch] if i is not _STOP])
+                return
+
+    def _write(self, batch):
+        items = [item for item, _ in batch if item is not _BARRIER]
+        error = None
+        if items:
+            try:
+                self._flush(items)
+            except Exception as e:  # reported to waiters; async writers only get the log
+                error = e
+                self.failed += len(items)
+                logger.exception('%s: failed to write a batch of %d items', self.name, len(items))
+            self.batches += 1
+            self.items += len(items)
+        with self._lock:
+            self._pending -= len(batch)
+        for _, ticket in batch:
+            ticket._finish(error)
+